@@ -41,6 +41,9 @@ class MainWindow(QWidget):
         # Store selected player
         self.selected_player = None
 
+        # Pose model being loaded in the background (see preload_model)
+        self.preloader = None
+
         # Create pages
         self.create_pixel_art_start_page()
         self.create_player_selection_page()
@@ -620,8 +623,18 @@ class MainWindow(QWidget):
 
     # Navigation methods
     def go_to_player_selection(self):
+        self.preload_model()
         self.stacked_widget.setCurrentIndex(1)
 
+    def preload_model(self):
+        """Load and warm up the pose model while the player is still on the menus"""
+        if self.preloader is None:
+            from ml_model import config
+            from ml_model.preload import DetectorPreloader
+
+            # The process pipeline loads its model in the inference process instead
+            self.preloader = DetectorPreloader(load_model=config.PIPELINE != "processes").start()
+
     def go_to_control_page(self):
         """Navigate to control page only if a player is selected"""
         if self.selected_player is not None:
@@ -654,7 +667,7 @@ class MainWindow(QWidget):
     def open_camera(self):
         """Opens the OpenCV camera directly in a new window."""
         from calibration_pose import CalibrationDialog
-        from client.PoseController import PoseController
+        from client.PoseController import pose_controller
 
         # pose_detector = ZonePoseDetector()
         camera_mode = int(self.radio_chip_1.isChecked())
@@ -671,12 +684,20 @@ class MainWindow(QWidget):
             self.showMinimized()
             print(camera_mode)
             print(f"Selected Robot ID: {self.selected_player}")
-            controller = PoseController(toy_id=self.selected_player)
-            if controller.connect():
-                controller.run_yolo_mode_UI(camera_mode)
-                self.showNormal()
-            else:
-                print("Failed to connect to ESP32.")
+            # Normally ready by now; each session gets a fresh detector
+            detector = self.preloader.take() if self.preloader else None
+            self.preloader = None
+            controller = pose_controller(toy_id=self.selected_player, detector=detector)
+            try:
+                if controller.connect():
+                    controller.run_yolo_mode_UI(camera_mode)
+                    self.showNormal()
+                else:
+                    print("Failed to connect to ESP32.")
+            finally:
+                # The ESP32 serves one client; free it for the next session
+                controller.close()
+            self.preload_model()  # For the next session
 
     def test_robot_connection(self):
         """Tests connection to the robot."""
@@ -0,0 +1,113 @@
+import sys
+
+sys.path.append("../")
+from ml_model import config
+from ml_model.frame_source import configured_source
+from ml_model.dual_player import DualPlayerDetector
+from ml_model.yolo_fightingpose_detection import ZonePoseDetector
+from .controller import ToyController
+from .PoseController import PoseController, apply_pose, pose_controller
+from .pipeline import PosePipeline
+
+
+class SharedLinkToyController(ToyController):
+    """ToyController for a second robot on the same ESP32, sending through another controller's socket"""
+
+    def __init__(self, shared, toy_id=1, board_toy_id=1, **kwargs):
+        self.shared = shared  # Not `link`: ToyController keeps its ConnectionManager there
+        super().__init__(shared.host, shared.port, toy_id=toy_id, board_toy_id=board_toy_id, **kwargs)
+
+    def connect(self, timeout=5.0):
+        return self.shared.connect(timeout)
+
+    def set_servo(self, toy_id, servo_type, angle):
+        return self.shared.set_servo(toy_id, servo_type, angle)
+
+    def set_servos(self, commands):
+        return self.shared.set_servos(commands)
+
+    def close(self):
+        self.scheduler.close()  # The shared controller owns the connection
+
+
+class SharedLinkPoseController(SharedLinkToyController, PoseController):
+    """PoseController for a second robot on the same ESP32 (see SharedLinkToyController)"""
+
+
+def pose_controllers(hosts):
+    """
+    One PoseController per robot, given the host of each robot's ESP32, for
+    runners whose detections come from a shared model (so each detector
+    loads none). The firmware serves one TCP client, so a robot on a board
+    that already has a controller sends through it, on the next servo slot.
+    """
+    controllers = []
+    for toy_id, host in enumerate(hosts):
+        shared = [controller for controller in controllers if controller.host == host]
+        detector = ZonePoseDetector(load_model=False)
+        if shared:
+            controllers.append(SharedLinkPoseController(shared[0], toy_id=toy_id, board_toy_id=len(shared),
+                                                        detector=detector))
+        else:
+            controllers.append(pose_controller(host=host, toy_id=toy_id, detector=detector))
+    return controllers
+
+
+class DualPoseController:
+    """
+    Drives both robots from one camera: a single DualPlayerDetector pass
+    yields a pose per player, and each pose is routed to that player's robot.
+    Both robots hang off one ESP32 (TOTAL_TOYS 2), as toy 0 and toy 1.
+    """
+
+    def __init__(self, host="192.168.4.1", port=8080, detector_mode=config.DETECTOR_MODE, swap_sides=False):
+        player1 = ToyController(host, port, toy_id=0, board_toy_id=0)
+        player2 = SharedLinkToyController(player1, toy_id=1, board_toy_id=1)
+        self.players = [player1, player2]
+
+        self.detector = DualPlayerDetector(mode=detector_mode, swap_sides=swap_sides)
+        self.current_poses = (None, None)
+        self.applied_poses = [None, None]
+
+    def connect(self):
+        return self.players[0].connect()
+
+    def close(self):
+        for player in reversed(self.players):  # The shared controller last; it owns the connection
+            player.close()
+
+    def update_pose(self, poses):
+        """Record the latest poses; returns True if either player's pose changed"""
+        changed = False
+        for number, (pose, current) in enumerate(zip(poses, self.current_poses)):
+            if pose and pose != current:
+                print(f"Player {number + 1} detected pose: {pose.value}")
+                changed = True
+        if changed:
+            self.current_poses = tuple(pose or current for pose, current in zip(poses, self.current_poses))
+        return changed
+
+    def handle_pose(self, poses):
+        """Send servo commands to each robot whose player changed pose"""
+        for number, (player, pose) in enumerate(zip(self.players, poses)):
+            if pose and pose != self.applied_poses[number]:
+                apply_pose(player, pose)
+                self.applied_poses[number] = pose
+
+    def run_yolo_mode(self):
+        self.run_pipeline(0)
+
+    def run_yolo_mode_UI(self, camera_mode):
+        self.run_pipeline(camera_mode)
+
+    def run_pipeline(self, camera_index):
+        """Run capture, inference, commands and display as separate pipeline stages"""
+        # YOLO_BRAWLERS_SOURCE can swap the camera for a video file or image directory
+        self.pipeline = PosePipeline(self, configured_source(camera_index), display=config.DISPLAY,
+                                     video_dir=config.VIDEO_DIR, video_fps=config.VIDEO_FPS)
+        try:
+            ok = self.pipeline.run()
+        finally:
+            self.close()  # The connection's background thread would otherwise keep it open
+        if not ok:
+            sys.exit(1)
@@ -3,87 +3,93 @@ import sys
 import cv2
 
 sys.path.append("../")
+from ml_model import config
+from ml_model.frame_source import configured_source
 from ml_model.yolo_fightingpose_detection import ZonePoseDetector, FightingPose
 from .controller import ToyController
+from .pipeline import PosePipeline
+
+
+def apply_pose(toy, pose):
+    """Send the servo commands for a detected pose to a ToyController"""
+    if pose == FightingPose.PUNCH_RIGHT:
+        toy.toggle_trigger1()
+        # toy.toggle_trigger1()
+    elif pose == FightingPose.PUNCH_LEFT:
+        toy.toggle_trigger2()
+        # toy.toggle_trigger2()
+    elif pose == FightingPose.WEAVE_RIGHT:
+        toy.weave_right()
+    elif pose == FightingPose.WEAVE_LEFT:
+        toy.weave_left()
+    elif pose == FightingPose.GUARD:
+        toy.guard()
+
+
+def robot_transport(toy_id):
+    """Configured transport for a robot; the last entry covers robots past the end of the list"""
+    return config.TRANSPORTS[min(toy_id, len(config.TRANSPORTS) - 1)]
+
+
+def pose_controller(**kwargs):
+    """
+    PoseController for the robot's transport (YOLO_BRAWLERS_TRANSPORT):
+    UdpPoseController for "udp"; for "tcp", the pipelined AsyncPoseController
+    with YOLO_BRAWLERS_ASYNC_COMMANDS=1, otherwise a plain PoseController
+    """
+    transport = robot_transport(kwargs.get("toy_id", 0))
+    if transport == "udp":
+        from .udp_controller import UdpPoseController
+        return UdpPoseController(**kwargs)
+    if transport != "tcp":
+        raise ValueError(f"Unknown transport: {transport} (choose tcp or udp)")
+    if config.ASYNC_COMMANDS:
+        from .async_controller import AsyncPoseController
+        return AsyncPoseController(**kwargs)
+    return PoseController(**kwargs)
+
 
 class PoseController(ToyController):
-    def __init__(self, host="192.168.4.1", port=8080, toy_id=0):
-        super().__init__(host, port, toy_id)
-        self.detector = ZonePoseDetector()
+    def __init__(self, host="192.168.4.1", port=8080, toy_id=0, detector_mode=config.DETECTOR_MODE,
+                 detector=None, board_toy_id=0):
+        super().__init__(host, port, toy_id=toy_id, board_toy_id=board_toy_id)
+        # A detector can be passed in when the model is shared with other controllers.
+        # With the process pipeline the model lives in the inference process instead
+        self.detector = detector or ZonePoseDetector(mode=detector_mode, load_model=config.PIPELINE != "processes")
+        self.current_pose = None
+
+    def update_pose(self, pose):
+        """Record the latest detected pose; returns True if it changed and should be acted on"""
+        if pose and pose != self.current_pose:
+            print(f"Detected pose: {pose.value}")
+            self.current_pose = pose
+            return True
+        return False
 
     def handle_pose(self, pose):
         """Send appropriate servo commands based on detected pose."""
-        if pose == FightingPose.PUNCH_RIGHT:
-            self.toggle_trigger1()
-            # self.toggle_trigger1()
-        elif pose == FightingPose.PUNCH_LEFT:
-            self.toggle_trigger2()
-            # self.toggle_trigger2()
-        elif pose == FightingPose.WEAVE_RIGHT:
-            self.weave_right()
-        elif pose == FightingPose.WEAVE_LEFT:
-            self.weave_left()
-        elif pose == FightingPose.GUARD:
-            self.guard()
+        apply_pose(self, pose)
 
     def run_yolo_mode(self):
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            print("Error: Could not open camera.")
-            sys.exit(1)
-
-        current_pose = None
-
-        try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    print("Error: Failed to capture frame.")
-                    break
-
-                annotated_frame, pose = self.detector.process_frame(frame)
-
-                if pose and pose != current_pose:
-                    print(f"Detected pose: {pose.value}")
-                    current_pose = pose
-                    self.handle_pose(pose)
-
-                cv2.imshow("Fighting Pose Detection", annotated_frame)
-
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    break
-
-        finally:
-            cap.release()
-            cv2.destroyAllWindows()
+        self.run_pipeline(0)
 
     def run_yolo_mode_UI(self, camera_mode):
-        cap = cv2.VideoCapture(camera_mode)
-        if not cap.isOpened():
-            print("Error: Could not open camera.")
-            sys.exit(1)
-
-        current_pose = None
-
+        self.run_pipeline(camera_mode)
+
+    def run_pipeline(self, camera_index):
+        """Run capture, inference, commands and display as separate pipeline stages"""
+        if config.PIPELINE == "processes":
+            # Capture and inference in their own processes (imported here, it imports this module)
+            from .process_pipeline import ProcessPosePipeline
+            self.pipeline = ProcessPosePipeline([self], [config.FRAME_SOURCE or camera_index], self.detector.mode,
+                                                display=config.DISPLAY)
+        else:
+            # YOLO_BRAWLERS_SOURCE can swap the camera for a video file or image directory
+            self.pipeline = PosePipeline(self, configured_source(camera_index), display=config.DISPLAY,
+                                         video_dir=config.VIDEO_DIR, video_fps=config.VIDEO_FPS)
         try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    print("Error: Failed to capture frame.")
-                    break
-
-                annotated_frame, pose = self.detector.process_frame(frame)
-
-                if pose and pose != current_pose:
-                    print(f"Detected pose: {pose.value}")
-                    current_pose = pose
-                    self.handle_pose(pose)
-
-                cv2.imshow("Fighting Pose Detection", annotated_frame)
-
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    break
-
+            ok = self.pipeline.run()
         finally:
-            cap.release()
-            cv2.destroyAllWindows()
\ No newline at end of file
+            self.close()  # The connection's background thread would otherwise keep it open
+        if not ok:
+            sys.exit(1)
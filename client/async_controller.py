@@ -0,0 +1,214 @@
+import asyncio
+import socket
+import struct
+import threading
+from collections import deque
+
+from .PoseController import PoseController
+from .controller import SERVO_NAMES, ToyController, pack_servos
+
+
+class AsyncToyController(ToyController):
+    """
+    ToyController that pipelines servo commands instead of waiting for each "OK".
+
+    An asyncio loop on a background thread owns the connection. A command is
+    written as soon as it is issued, with up to max_in_flight commands still
+    waiting for their ack. The ESP32 acks every frame in order ("OK" for a
+    single command, one byte for a multi-servo frame), so a reader task
+    matches each ack to the oldest pending frame.
+
+    set_servo(), set_servos() and the pose methods (toggle_trigger1,
+    weave_left, guard, ...) are fire-and-forget: they return at once with a
+    concurrent.futures.Future of the ack. set_servo_async(),
+    set_servos_async() and perform() are the awaitable variants. If an ack
+    doesn't arrive within ack_timeout, the connection is dropped, every
+    pending command fails, and the next command reconnects.
+    """
+
+    def __init__(self, *args, max_in_flight=8, ack_timeout=1.0, connect_timeout=5.0, **kwargs):
+        self.max_in_flight = max_in_flight
+        self.ack_timeout = ack_timeout
+        self.connect_timeout = connect_timeout
+        self.reader = None
+        self.writer = None
+        self.ack_task = None
+        self.pending = deque()  # (future, expected ack) of written frames, oldest first
+        self.issued = None  # Collects the futures of one perform() call
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="toy-commands", daemon=True)
+        self.thread.start()
+        self.connect_lock = asyncio.Lock()
+        self.frame_written = asyncio.Event()
+        self.window = asyncio.Semaphore(max_in_flight)
+
+        # Counters exposed through stats()
+        self.sent_count = 0
+        self.acked_count = 0
+        self.failed_count = 0
+
+        super().__init__(*args, **kwargs)
+
+    def run(self, coroutine, timeout=None):
+        """Run a coroutine on the controller's loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def connect(self):
+        return self.run(self.connect_async())
+
+    async def connect_async(self):
+        async with self.connect_lock:
+            if self.writer is not None:
+                return True
+            try:
+                self.reader, self.writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port),
+                                                                  self.connect_timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                print(f"Connection failed: {e}")
+                return False
+            # Commands are 3 bytes; don't let Nagle hold them back waiting for more
+            self.writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.ack_task = self.loop.create_task(self.read_acks(self.reader, self.writer))
+            print(f"Connected to {self.host}:{self.port}")
+            return True
+
+    async def read_acks(self, reader, writer):
+        try:
+            while True:
+                if not self.pending:
+                    # The ack length depends on the frame, so wait until there is one
+                    self.frame_written.clear()
+                    await self.frame_written.wait()
+                    continue
+                future, expected = self.pending[0]
+                response = await reader.readexactly(len(expected))
+                self.pending.popleft()
+                if not future.done():
+                    future.set_result(response == expected)
+        except (asyncio.IncompleteReadError, OSError):
+            self.drop_connection(writer)
+
+    def drop_connection(self, writer):
+        """Close a connection (if it is still the current one) and fail its pending commands"""
+        if writer is not self.writer:
+            return
+        writer.close()
+        self.reader = self.writer = None
+        if self.ack_task is not asyncio.current_task():
+            self.ack_task.cancel()
+        self.ack_task = None
+        while self.pending:
+            future, _ = self.pending.popleft()
+            if not future.done():
+                future.set_result(False)
+
+    async def send_async(self, data, expected):
+        """Write one frame and wait for its ack; True if the ack was the expected one"""
+        if self.writer is None and not await self.connect_async():
+            self.failed_count += 1
+            return False
+
+        async with self.window:
+            writer = self.writer
+            if writer is None:
+                self.failed_count += 1
+                return False
+            future = self.loop.create_future()
+            self.pending.append((future, expected))
+            writer.write(data)
+            self.frame_written.set()
+            self.sent_count += 1
+            try:
+                await writer.drain()
+                ok = await asyncio.wait_for(asyncio.shield(future), self.ack_timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                print(f"Failed to set servo: {e or 'no ack'}")
+                self.drop_connection(writer)  # Acks can't be matched to frames anymore
+                ok = False
+
+        if ok:
+            self.acked_count += 1
+        else:
+            self.failed_count += 1
+        return ok
+
+    async def set_servo_async(self, toy_id, servo_type, angle):
+        """Send a servo command and wait for its ack; True if the ESP32 answered OK"""
+        ok = await self.send_async(struct.pack("BBB", toy_id, servo_type, angle), b"OK")
+        if ok:
+            print(f"Toy{toy_id + 1} {SERVO_NAMES[servo_type]} set to {angle} degrees")
+        return ok
+
+    async def set_servos_async(self, commands):
+        """Send (toy_id, servo_type, angle) commands in one multi-servo frame (one by one if multi_servo is off)"""
+        if not self.multi_servo:
+            results = await asyncio.gather(*(self.set_servo_async(*command) for command in commands))
+            return all(results)
+        ok = await self.send_async(pack_servos(commands), bytes([len(commands)]))
+        if ok:
+            print(", ".join(f"Toy{toy_id + 1} {SERVO_NAMES[servo_type]} set to {angle} degrees"
+                            for toy_id, servo_type, angle in commands))
+        return ok
+
+    def set_servo(self, toy_id, servo_type, angle):
+        """Queue a servo command without waiting; returns a Future that resolves to the ack result"""
+        future = asyncio.run_coroutine_threadsafe(self.set_servo_async(toy_id, servo_type, angle), self.loop)
+        if self.issued is not None:
+            self.issued.append(future)
+        return future
+
+    def set_servos(self, commands):
+        """Queue a multi-servo frame without waiting; returns a Future that resolves to the ack result"""
+        future = asyncio.run_coroutine_threadsafe(self.set_servos_async(commands), self.loop)
+        if self.issued is not None:
+            self.issued.append(future)
+        return future
+
+    async def perform(self, action, *args):
+        """
+        Awaitable variant of a pose method, e.g. await toy.perform(toy.guard):
+        True once every servo command it sent has been acknowledged
+        """
+        self.issued = []
+        try:
+            action(*args)
+        finally:
+            futures, self.issued = self.issued, None
+        results = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+        return all(results)
+
+    async def flush_async(self):
+        in_flight = [future for future, _ in self.pending]
+        if in_flight:
+            await asyncio.wait(in_flight, timeout=self.ack_timeout)
+
+    def stats(self):
+        """Commands written, acknowledged and failed, and how many are waiting for an ack"""
+        return {"sent": self.sent_count, "acked": self.acked_count, "failed": self.failed_count,
+                "in_flight": len(self.pending)}
+
+    def close(self):
+        """Wait briefly for outstanding acks, then close the connection and stop the loop"""
+        if not self.thread.is_alive():
+            return
+        self.scheduler.close()
+        self.run(self.flush_async())
+        self.run(self.disconnect_async())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    async def disconnect_async(self):
+        """Close the connection and wait for the ack reader to finish, so the loop can stop cleanly"""
+        ack_task = self.ack_task
+        if self.writer is not None:
+            self.drop_connection(self.writer)
+        if ack_task is not None:
+            try:
+                await ack_task
+            except asyncio.CancelledError:
+                pass
+
+
+class AsyncPoseController(AsyncToyController, PoseController):
+    """PoseController whose servo commands are pipelined (see AsyncToyController)"""
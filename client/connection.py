@@ -0,0 +1,210 @@
+import errno
+import random
+import select
+import socket
+import threading
+import time
+
+
+class ConnectionManager:
+    """
+    Owns the TCP connection to an ESP32 on a background thread.
+
+    The thread connects without blocking anyone (a non-blocking connect that
+    close() can interrupt), retries with exponential backoff and jitter while
+    the board is unreachable, and checks an idle link every probe_interval
+    seconds: a peer that closed the socket shows up as a readable zero-byte
+    peek, and the probe callback (if any) sends a real request, with its own
+    short probe_timeout since callers wait on the lock meanwhile. TCP
+    keepalive catches links that die silently in between.
+
+    Callers use the socket under `lock` and report failures with drop().
+    While the link is down they hold() their commands instead; only the
+    newest value per key is kept, and the replay callback sends them over
+    the new socket before anyone else gets to use it.
+    """
+
+    def __init__(self, host, port, connect_timeout=5.0, io_timeout=5.0, min_backoff=0.25, max_backoff=5.0,
+                 probe_interval=1.0, probe_timeout=0.5, probe=None, replay=None):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.io_timeout = io_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.probe = probe  # probe(sock) -> bool, True if the board answered
+        self.replay = replay  # replay(sock, [(key, value), ...]), raises OSError on failure
+
+        self.lock = threading.RLock()
+        self.socket = None
+        self.connected = threading.Event()
+        self.wake = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.held = {}
+        self.last_used = time.monotonic()
+
+        # Counters exposed through stats()
+        self.connect_count = 0
+        self.drop_count = 0
+        self.held_count = 0
+        self.coalesced_count = 0
+
+    def start(self):
+        """Start connecting in the background (once)"""
+        if self.thread is None:
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.run, name=f"link-{self.host}", daemon=True)
+            self.thread.start()
+
+    def wait(self, timeout=None):
+        """Wait until the link is up; returns False on timeout"""
+        return self.connected.wait(timeout)
+
+    def hold(self, key, value):
+        """Keep a command for when the link is back; a newer one for the same key replaces it"""
+        with self.lock:
+            if key in self.held:
+                del self.held[key]  # Re-insert so replay keeps the order of the newest commands
+                self.coalesced_count += 1
+            self.held[key] = value
+            self.held_count += 1
+
+    def used(self):
+        """Note that the link just carried a request, so it needs no probe"""
+        self.last_used = time.monotonic()
+
+    def drop(self, sock, error=None):
+        """Close a socket that failed (if it is still the current one) and reconnect in the background"""
+        with self.lock:
+            if sock is not self.socket:
+                return
+            self.socket = None
+            self.connected.clear()
+            self.drop_count += 1
+        sock.close()
+        print(f"Lost connection to {self.host}:{self.port}" + (f": {error}" if error else "") +
+              "; reconnecting in the background")
+        self.wake.set()
+
+    def open_socket(self):
+        """Connect with a timeout, in slices so close() doesn't have to wait; None on failure"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        error = sock.connect_ex((self.host, self.port))
+        deadline = time.monotonic() + self.connect_timeout
+        while error in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY) and not self.stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                error = errno.ETIMEDOUT
+                break
+            _, writable, _ = select.select([], [sock], [], min(remaining, 0.1))
+            if writable:
+                error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if error or self.stop_event.is_set():
+            sock.close()
+            return None
+
+        sock.setblocking(True)
+        sock.settimeout(self.io_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for option, value in (("TCP_KEEPIDLE", 2), ("TCP_KEEPINTVL", 1), ("TCP_KEEPCNT", 3)):
+            if hasattr(socket, option):
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+        return sock
+
+    def publish(self, sock):
+        """Replay held commands over a new socket, then hand it to the callers; False if that failed"""
+        while True:
+            with self.lock:
+                held = list(self.held.items())
+                self.held.clear()
+                if not held:
+                    self.socket = sock
+                    self.used()
+                    self.connected.set()
+                    return True
+            try:
+                if self.replay:
+                    self.replay(sock, held)
+            except OSError as e:
+                print(f"Failed to replay held commands: {e}")
+                with self.lock:
+                    for key, value in held:
+                        self.held.setdefault(key, value)  # Anything newer stays
+                sock.close()
+                return False
+
+    def check(self):
+        """Health probe of an idle link"""
+        with self.lock:
+            sock = self.socket
+            if sock is None or time.monotonic() - self.last_used < self.probe_interval:
+                return
+            try:
+                readable, _, _ = select.select([sock], [], [], 0)
+                if readable:
+                    # Nothing is expected while idle: either the board closed the link or acks are out of step
+                    alive = False
+                    error = "closed by the board" if sock.recv(1, socket.MSG_PEEK) == b"" else "unexpected data"
+                elif self.probe:
+                    sock.settimeout(self.probe_timeout)  # Requests wait on the lock while the probe runs
+                    try:
+                        alive = self.probe(sock)
+                    finally:
+                        sock.settimeout(self.io_timeout)
+                    error = "no answer to probe"
+                else:
+                    alive = True
+            except OSError as e:
+                alive, error = False, e
+            if alive:
+                self.used()
+                return
+        self.drop(sock, error)
+
+    def run(self):
+        backoff = self.min_backoff
+        reported = False
+        while not self.stop_event.is_set():
+            if self.socket is not None:
+                if self.wake.wait(self.probe_interval):
+                    self.wake.clear()
+                else:
+                    self.check()
+                continue
+
+            sock = self.open_socket()
+            if sock is not None and self.publish(sock):
+                self.connect_count += 1
+                print(f"Connected to {self.host}:{self.port}")
+                backoff = self.min_backoff
+                reported = False
+                continue
+
+            if not reported:
+                print(f"Connection to {self.host}:{self.port} failed; retrying in the background")
+                reported = True
+            self.stop_event.wait(backoff * random.uniform(0.8, 1.2))
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def stats(self):
+        """Connects, drops, commands held while down and how many of those a newer one replaced"""
+        with self.lock:
+            return {"connects": self.connect_count, "drops": self.drop_count, "held": self.held_count,
+                    "coalesced": self.coalesced_count, "pending": len(self.held)}
+
+    def close(self):
+        self.stop_event.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        with self.lock:
+            sock, self.socket = self.socket, None
+            self.connected.clear()
+        if sock is not None:
+            sock.close()
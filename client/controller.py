@@ -1,34 +1,65 @@
-import socket
 import struct
+import sys
 import time
-from ml_model.yolo_fightingpose_detection import ZonePoseDetector, FightingPose
+
+sys.path.append("../")
+from ml_model import config
+from .connection import ConnectionManager
+from .scheduler import ServoScheduler
+
+SERVO_NAMES = ["Trigger1", "Trigger2", "Weave"]
+
+# Wire protocol. A plain command is 3 bytes (toy_id, servo_type, angle) and
+# is acked with b"OK". A multi-servo frame starts with MULTI_SERVO_FRAME (a
+# byte no toy_id uses) and a count, followed by that many command triples;
+# it is acked with a single byte, the number of servos the ESP32 set. A
+# multi-servo frame with no commands is a ping, acked with a zero byte.
+MULTI_SERVO_FRAME = 0xF1
+MAX_FRAME_SERVOS = 6
+PING_FRAME = bytes([MULTI_SERVO_FRAME, 0])
+
+
+def pack_servos(commands):
+    """Multi-servo frame for a list of (toy_id, servo_type, angle)"""
+    if not 0 < len(commands) <= MAX_FRAME_SERVOS:
+        raise ValueError(f"A frame carries 1 to {MAX_FRAME_SERVOS} servo commands")
+    return bytes([MULTI_SERVO_FRAME, len(commands)]) + b"".join(struct.pack("BBB", *command) for command in commands)
+
 
 class ToyController:
-    def __init__(self, host="192.168.4.1", port=8080, trigger1_pos=90, trigger2_pos=90, weave_pos=90, toy_id=0):
+    def __init__(self, host="192.168.4.1", port=8080, trigger1_pos=90, trigger2_pos=90, weave_pos=90, toy_id=0,
+                 board_toy_id=0, multi_servo=config.MULTI_SERVO_FRAMES):
         self.host = host
         self.port = port
-        self.socket = None
 
-        self.toy_id = toy_id
+        # Firmware with multi-servo frame support sets a whole pose in one message
+        self.multi_servo = multi_servo
 
-        if self.toy_id == 0:  # Player 1
-            self.trigger1_pos = 150
-            self.set_servo(self.toy_id, 0, self.trigger1_pos)  # Starting position for trigger 1
+        # Connects, reconnects and probes in the background; commands sent
+        # while the link is down are held and sent once it is back
+        self.link = ConnectionManager(host, port, probe=self.ping if multi_servo else None, replay=self.replay)
 
-            self.trigger2_pos = 30
-            self.set_servo(self.toy_id, 1, self.trigger2_pos)  # Starting position for trigger 2 (left punch)
+        self.toy_id = toy_id
 
-            self.weave_pos = 90
-            self.weave = self.set_servo(self.toy_id, 2, self.weave_pos)  # Starting position should be guard
-        else:  # Player 2
-            self.trigger1_pos = 180
-            self.set_servo(0, 0, self.trigger1_pos)  # Starting position for trigger 1
+        # Servo slot on the ESP32 this robot is wired to (each robot has its own board by default)
+        self.board_toy_id = board_toy_id
 
-            self.trigger2_pos = 20
-            self.set_servo(0, 1, self.trigger2_pos)  # Starting position for trigger 2 (left punch)
+        # Drops commands for angles a servo already has and, if configured,
+        # batches them per tick and rate-limits each servo (see ServoScheduler)
+        self.scheduler = ServoScheduler(self.set_servos, tick=config.COMMAND_TICK_MS / 1000,
+                                        min_interval=config.SERVO_MIN_INTERVAL_MS / 1000)
 
-            self.weave_pos = 110
-            self.weave = self.set_servo(0, 2, self.weave_pos)  # Starting position should be guard
+        if self.toy_id == 0:  # Player 1
+            self.trigger1_pos = 150  # Starting position for trigger 1
+            self.trigger2_pos = 30  # Starting position for trigger 2 (left punch)
+            self.weave_pos = 90  # Starting position should be guard
+        else:  # Player 2
+            self.trigger1_pos = 180  # Starting position for trigger 1
+            self.trigger2_pos = 20  # Starting position for trigger 2 (left punch)
+            self.weave_pos = 110  # Starting position should be guard
+        self.move((self.board_toy_id, 0, self.trigger1_pos),
+                  (self.board_toy_id, 1, self.trigger2_pos),
+                  (self.board_toy_id, 2, self.weave_pos))
 
         # Servo IDs
         self.servo_right_punch = 0
@@ -36,16 +67,13 @@ class ToyController:
         self.servo_weave = 2
         print(f"Hola I'm robot {self.toy_id}")
 
-    def connect(self):
-        try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.settimeout(5.0)
-            self.socket.connect((self.host, self.port))
-            print(f"Connected to {self.host}:{self.port}")
+    def connect(self, timeout=5.0):
+        """Start connecting in the background and wait up to timeout seconds; True once the link is up"""
+        self.link.start()
+        if self.link.wait(timeout):
             return True
-        except Exception as e:
-            print(f"Connection failed: {e}")
-            return False
+        print(f"Could not reach {self.host}:{self.port} yet; commands are held until it connects")
+        return False
 
     def set_servo(self, toy_id, servo_type, angle):
         """
@@ -54,29 +82,83 @@ class ToyController:
         servo_type: 0 for trigger1, 1 for trigger2, 2 for weave
         angle: 0-180
         """
-        if not self.socket:
-            if not self.connect():
-                return False
-
-        try:
-            data = struct.pack("BBB", toy_id, servo_type, angle)
-            self.socket.send(data)
-            response = self.socket.recv(2)
-
-            if response == b"OK":
-                servo_names = ["Trigger1", "Trigger2", "Weave"]
-                print(f"Toy{toy_id + 1} {servo_names[servo_type]} set to {angle} degrees")
-                return True
+        response = self.request(struct.pack("BBB", toy_id, servo_type, angle), 2)
+        if response is None:
+            self.link.hold((toy_id, servo_type), angle)
             return False
-        except Exception as e:
-            print(f"Failed to set servo: {e}")
-            self.socket = None
+        if response == b"OK":
+            print(f"Toy{toy_id + 1} {SERVO_NAMES[servo_type]} set to {angle} degrees")
+            return True
+        return False
+
+    def set_servos(self, commands):
+        """
+        Set several servos, given as (toy_id, servo_type, angle), in one
+        multi-servo frame; one command at a time if multi_servo is off.
+        Returns True if every servo was set.
+        """
+        if not self.multi_servo:
+            return all([self.set_servo(*command) for command in commands])
+
+        response = self.request(pack_servos(commands), 1)
+        if response is None:
+            for toy_id, servo_type, angle in commands:
+                self.link.hold((toy_id, servo_type), angle)
             return False
+        if response == bytes([len(commands)]):
+            print(", ".join(f"Toy{toy_id + 1} {SERVO_NAMES[servo_type]} set to {angle} degrees"
+                            for toy_id, servo_type, angle in commands))
+            return True
+        return False
+
+    def move(self, *commands):
+        """
+        Set servos, given as (toy_id, servo_type, angle), through the
+        scheduler: servos already at their angle are skipped
+        """
+        return self.scheduler.submit(commands)
+
+    def request(self, data, response_length):
+        """Send one frame and return the ack, or None if the link is down or just failed"""
+        self.link.start()
+        with self.link.lock:
+            sock = self.link.socket
+            if sock is None:
+                return None
+            try:
+                response = self.exchange(sock, data, response_length)
+                self.link.used()
+                return response
+            except OSError as e:
+                self.link.drop(sock, e)
+                return None
+
+    @staticmethod
+    def exchange(sock, data, response_length):
+        sock.sendall(data)
+        response = sock.recv(response_length)
+        if not response:
+            raise ConnectionError("closed by the board")
+        return response
+
+    def replay(self, sock, held):
+        """Send commands held while the link was down over a new socket"""
+        commands = [(toy_id, servo_type, angle) for (toy_id, servo_type), angle in held]
+        if self.multi_servo:
+            for start in range(0, len(commands), MAX_FRAME_SERVOS):
+                chunk = commands[start:start + MAX_FRAME_SERVOS]
+                self.exchange(sock, pack_servos(chunk), 1)
+        else:
+            for command in commands:
+                self.exchange(sock, struct.pack("BBB", *command), 2)
+        print(f"Sent {len(commands)} servo commands held while disconnected")
+
+    def ping(self, sock):
+        return self.exchange(sock, PING_FRAME, 1) == b"\x00"
 
     def close(self):
-        if self.socket:
-            self.socket.close()
-            self.socket = None
+        self.scheduler.close()
+        self.link.close()
 
     def toggle_trigger1(self):
         """Toggle Toy 1 Trigger 1 between 90 and 145 degrees"""
@@ -84,7 +166,7 @@ class ToyController:
             self.trigger1_pos = 90 if self.trigger1_pos == 150 else 150
         else:
             self.trigger1_pos = 130 if self.trigger1_pos == 180 else 180
-        return self.set_servo(0, self.servo_right_punch, self.trigger1_pos)
+        return self.move((self.board_toy_id, self.servo_right_punch, self.trigger1_pos))
 
     def toggle_trigger2(self):
         """Toggle Toy 1 Trigger 2 between 90 and 145 degrees"""
@@ -92,7 +174,7 @@ class ToyController:
             self.trigger2_pos = 80 if self.trigger2_pos == 30 else 30
         else:
             self.trigger2_pos = 70 if self.trigger2_pos == 20 else 20
-        return self.set_servo(0, self.servo_left_punch, self.trigger2_pos)
+        return self.move((self.board_toy_id, self.servo_left_punch, self.trigger2_pos))
 
     def weave_right(self):
         """Toggle Toy 1 Weave between 90 and 145 degrees"""
@@ -100,7 +182,7 @@ class ToyController:
             self.weave_pos = 45
         else:
             self.weave_pos = 135
-        return self.set_servo(0, self.servo_weave, self.weave_pos)
+        return self.move((self.board_toy_id, self.servo_weave, self.weave_pos))
 
     def weave_left(self):
         """Toggle Toy 1 Weave between 90 and 145 degrees"""
@@ -108,7 +190,7 @@ class ToyController:
             self.weave_pos = 110
         else:
             self.weave_pos = 65
-        return self.set_servo(0, 2, self.weave_pos)
+        return self.move((self.board_toy_id, 2, self.weave_pos))
 
     def guard(self):
         """Toggle Toy 1 Weave between 90 and 145 degrees"""
@@ -116,14 +198,12 @@ class ToyController:
             self.weave_pos = 90
             self.trigger1_pos = 150
             self.trigger2_pos = 30
-            self.set_servo(0, self.servo_right_punch, 150)
-            self.set_servo(0, self.servo_left_punch, 30)
 
         else:
             self.weave_pos = 110
             self.trigger1_pos = 180
             self.trigger2_pos = 20
-            self.set_servo(0, self.servo_right_punch, 180)
-            self.set_servo(0, self.servo_left_punch, 20)
 
-        return self.set_servo(0, self.servo_weave, self.weave_pos)
+        return self.move((self.board_toy_id, self.servo_right_punch, self.trigger1_pos),
+                         (self.board_toy_id, self.servo_left_punch, self.trigger2_pos),
+                         (self.board_toy_id, self.servo_weave, self.weave_pos))
@@ -0,0 +1,124 @@
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+
+class SharedFrameRing:
+    """
+    Fixed-size frames in shared memory, written by one capture process and
+    read in place by other processes.
+
+    The block starts with a small header (latest slot, frame counter, the
+    slot each reader holds, and a sequence number and capture timestamp per
+    slot) followed by `slots` frames. The writer always fills a slot that is
+    neither the latest one nor held by a reader, so a reader can run
+    inference directly on the shared frame while new frames keep arriving;
+    frames nobody picked up in time are simply overwritten (latest wins).
+    Only the header is guarded by `condition`, a multiprocessing.Condition
+    created by the parent and handed to every process. The process that
+    creates the ring removes it on close(), so it should outlive the others.
+    """
+
+    LATEST, COUNT = 0, 1
+
+    def __init__(self, block, shape, slots, readers, condition, owner):
+        self.block = block
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.readers = readers
+        self.condition = condition
+        self.owner = owner
+
+        header_size = 2 + readers + slots
+        self.header = np.ndarray((header_size,), dtype=np.int64, buffer=block.buf)
+        self.reading = self.header[2:2 + readers]
+        self.sequence = self.header[2 + readers:]
+        self.timestamps = np.ndarray((slots,), dtype=np.float64, buffer=block.buf, offset=8 * header_size)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=block.buf,
+                                 offset=self.frames_offset(slots, readers))
+        self.next_slot = 0
+
+    @staticmethod
+    def frames_offset(slots, readers):
+        header = 8 * (2 + readers + slots) + 8 * slots
+        return -(-header // 64) * 64  # Cache-line aligned frames
+
+    @classmethod
+    def create(cls, shape, condition, slots=4, readers=2):
+        """New ring; the creating process unlinks it on close()"""
+        if slots < readers + 2:
+            raise ValueError("The ring needs at least two more slots than readers")
+        size = cls.frames_offset(slots, readers) + slots * int(np.prod(shape))
+        block = shared_memory.SharedMemory(create=True, size=size)
+        ring = cls(block, shape, slots, readers, condition, owner=True)
+        ring.header[:] = 0
+        ring.header[cls.LATEST] = -1
+        ring.reading[:] = -1
+        return ring
+
+    @classmethod
+    def attach(cls, spec, condition):
+        """Open a ring created in another process from its spec"""
+        name, shape, slots, readers = spec
+        return cls(shared_memory.SharedMemory(name=name), shape, slots, readers, condition, owner=False)
+
+    @property
+    def spec(self):
+        """Picklable (name, shape, slots, readers) to attach from another process"""
+        return self.block.name, self.shape, self.slots, self.readers
+
+    def write(self, frame, timestamp):
+        """Copy a frame into a free slot and publish it as the latest"""
+        with self.condition:
+            busy = set(self.reading.tolist()) | {int(self.header[self.LATEST])}
+            slot = self.next_slot
+            while slot in busy:
+                slot = (slot + 1) % self.slots
+
+        if frame.shape != self.shape:
+            frame = cv2.resize(frame, (self.shape[1], self.shape[0]))
+        np.copyto(self.frames[slot], frame)
+
+        with self.condition:
+            self.header[self.COUNT] += 1
+            self.sequence[slot] = self.header[self.COUNT]
+            self.timestamps[slot] = timestamp
+            self.header[self.LATEST] = slot
+            self.condition.notify_all()
+        self.next_slot = (slot + 1) % self.slots
+
+    def acquire(self, reader, last_sequence=0, timeout=None):
+        """
+        Hold the latest frame newer than last_sequence for this reader.
+
+        Returns (slot, sequence, timestamp), or None on timeout. The slot
+        stays untouched by the writer until the reader's next acquire() or
+        release().
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.header[self.COUNT] > last_sequence, timeout):
+                return None
+            slot = int(self.header[self.LATEST])
+            self.reading[reader] = slot
+            return slot, int(self.sequence[slot]), float(self.timestamps[slot])
+
+    def release(self, reader):
+        with self.condition:
+            self.reading[reader] = -1
+
+    def frame(self, slot):
+        """Read-only view of a slot, no copy"""
+        view = self.frames[slot]
+        view.flags.writeable = False
+        return view
+
+    def close(self):
+        # Views into the block must be gone before it can be closed
+        self.header = self.reading = self.sequence = self.timestamps = self.frames = None
+        try:
+            self.block.close()
+        except BufferError:
+            pass  # A frame view is still referenced; the mapping goes away with the process
+        if self.owner:
+            self.block.unlink()
@@ -1,4 +1,7 @@
-from PoseController import PoseController
+from PoseController import pose_controller
+from DualPoseController import DualPoseController
+from multi_camera import run_batched_players
+from process_pipeline import run_process_players
 from ml_model.yolo_fightingpose_detection import ZonePoseDetector 
 from KeyboardController import KeyboardController
 import sys
@@ -7,14 +10,27 @@ import os
 
 
 def main():
-    mode = input("Choose mode (yolo/keyboard): ").strip().lower()
+    mode = input("Choose mode (yolo/dual/batched/processes/keyboard): ").strip().lower()
 
     if mode == "yolo":
-        controller = PoseController()
+        controller = pose_controller()
         if controller.connect():
             controller.run_yolo_mode()
         else:
             print("Failed to connect to ESP32.")
+    elif mode == "dual":
+        # One camera sees both fighters; both robots are on the same ESP32
+        controller = DualPoseController()
+        if controller.connect():
+            controller.run_yolo_mode()
+        else:
+            print("Failed to connect to ESP32.")
+    elif mode == "batched":
+        # Two webcams on this laptop, one model running both as a batch
+        run_batched_players()
+    elif mode == "processes":
+        # Two webcams, each with its own capture and inference process
+        run_process_players()
     elif mode == "keyboard":
         controller = KeyboardController(toy_id=0)  # arg cli
         if controller.connect():
@@ -25,7 +41,7 @@ def main():
     elif mode == "test":
         model = ZonePoseDetector()
     else:
-        print("Invalid mode. Choose 'yolo' or 'keyboard'.")
+        print("Invalid mode. Choose 'yolo', 'dual', 'batched', 'processes' or 'keyboard'.")
 
 if __name__ == "__main__":
     main()
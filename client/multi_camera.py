@@ -0,0 +1,185 @@
+import sys
+import threading
+import time
+
+import cv2
+
+sys.path.append("../")
+from ml_model import config
+from ml_model.frame_source import camera_settings, open_source
+from ml_model.yolo_fightingpose_detection import ZonePoseDetector
+from .DualPoseController import pose_controllers
+from .pipeline import LatestQueue, StageStats
+
+
+class BatchedDetectorService:
+    """
+    One model for several cameras on the same host.
+
+    A capture thread per camera keeps only that camera's newest frame. The
+    inference thread gathers the latest frame from every camera, runs them
+    through the model as one batch, and hands each camera's detections to
+    its own PoseController, whose model-less detector classifies and
+    smooths that player's pose. Commands go out on one thread per
+    controller, so one slow robot never holds up the other.
+    """
+
+    def __init__(self, controllers, camera_indices, detector, gather_timeout=1 / 60,
+                 stats_interval=5.0, display=True):
+        if len(controllers) != len(camera_indices):
+            raise ValueError("Need exactly one camera per controller")
+        self.controllers = controllers
+        self.camera_indices = camera_indices
+        self.detector = detector
+        self.gather_timeout = gather_timeout  # How long to wait for the other cameras' frames
+        self.stats_interval = stats_interval
+        self.display = display
+
+        for controller in controllers:
+            controller.detector.render = display
+
+        cameras = range(len(camera_indices))
+        self.frame_queues = [LatestQueue(1) for _ in cameras]
+        self.command_queues = [LatestQueue(1) for _ in cameras]
+        self.display_queues = [LatestQueue(1) for _ in cameras]
+        self.stop_event = threading.Event()
+
+        # Per-camera processed frame counts and batch timing
+        self.camera_frames = [0 for _ in cameras]
+        self.batch_stats = StageStats()
+        self.batched_frames = 0
+        self.started = None
+
+    def capture_loop(self, camera, source):
+        while not self.stop_event.is_set():
+            frame, _ = source.read()
+            if frame is None:
+                print(f"Error: Failed to capture frame from camera {self.camera_indices[camera]}.")
+                self.stop_event.set()
+                break
+            self.frame_queues[camera].put(frame)
+
+    def gather_frames(self):
+        """Latest frame from each camera that delivers one before the gather deadline"""
+        deadline = time.perf_counter() + self.gather_timeout
+        cameras, frames = [], []
+        for camera, queue in enumerate(self.frame_queues):
+            frame = queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+            if frame is not None:
+                cameras.append(camera)
+                frames.append(frame)
+        return cameras, frames
+
+    def inference_loop(self):
+        while not self.stop_event.is_set():
+            cameras, frames = self.gather_frames()
+            if not frames:
+                continue
+
+            started = time.perf_counter()
+            batch = self.detector.detect_batch(frames)
+            self.batch_stats.record(started)
+            self.batched_frames += len(frames)
+
+            for camera, frame, detections in zip(cameras, frames, batch):
+                controller = self.controllers[camera]
+                annotated_frame, pose = controller.detector.process_detections(frame, detections)
+                if controller.update_pose(pose):
+                    self.command_queues[camera].put(pose)
+                if self.display:
+                    self.display_queues[camera].put(annotated_frame)
+                self.camera_frames[camera] += 1
+
+    def command_loop(self, camera):
+        controller = self.controllers[camera]
+        while not self.stop_event.is_set():
+            pose = self.command_queues[camera].get(timeout=0.1)
+            if pose is not None:
+                controller.handle_pose(pose)
+
+    def display_loop(self):
+        last_report = time.monotonic()
+        while not self.stop_event.is_set():
+            if self.display:
+                for camera, queue in enumerate(self.display_queues):
+                    frame = queue.get(timeout=0.01)
+                    if frame is not None:
+                        cv2.imshow(f"Fighting Pose Detection (player {camera + 1})", frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    self.stop_event.set()
+            else:
+                self.stop_event.wait(0.1)
+
+            if self.stats_interval and time.monotonic() - last_report >= self.stats_interval:
+                self.print_stats()
+                last_report = time.monotonic()
+
+    def stats(self):
+        """Per-camera FPS plus average batch size and batch latency"""
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        batches = self.batch_stats.processed
+        return {
+            "camera_fps": [frames / elapsed if elapsed else 0.0 for frames in self.camera_frames],
+            "batches": batches,
+            "avg_batch_size": self.batched_frames / batches if batches else 0.0,
+            "avg_batch_ms": 1000.0 * self.batch_stats.busy_time / batches if batches else 0.0,
+            "dropped": [queue.drop_count for queue in self.frame_queues],
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        fps = ", ".join(f"camera {index}: {value:.1f}"
+                        for index, value in zip(self.camera_indices, stats["camera_fps"]))
+        print(f"[batched] FPS {fps} | batch size {stats['avg_batch_size']:.2f}, "
+              f"latency {stats['avg_batch_ms']:.1f}ms | dropped frames {stats['dropped']}")
+
+    def run(self):
+        """Run until 'q' is pressed or a camera stops; returns False if a camera fails to open"""
+        sources = []
+        for index in self.camera_indices:
+            source = open_source(index, **camera_settings())
+            if not source.open():
+                for opened in sources:
+                    opened.release()
+                return False
+            sources.append(source)
+
+        threads = [threading.Thread(target=self.capture_loop, args=(camera, source), daemon=True)
+                   for camera, source in enumerate(sources)]
+        threads += [threading.Thread(target=self.command_loop, args=(camera,), daemon=True)
+                    for camera in range(len(sources))]
+        threads.append(threading.Thread(target=self.inference_loop, daemon=True))
+
+        self.started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        try:
+            self.display_loop()
+        finally:
+            self.stop_event.set()
+            for queue in self.frame_queues + self.command_queues + self.display_queues:
+                queue.close()
+            for thread in threads:
+                thread.join(timeout=2.0)
+            for source in sources:
+                source.release()
+            if self.display:
+                cv2.destroyAllWindows()
+            self.print_stats()
+        return True
+
+
+def run_batched_players(camera_indices=(0, 1), hosts=("192.168.4.1", "192.168.4.1"),
+                        detector_mode=config.DETECTOR_MODE):
+    """Start one PoseController per camera sharing a single batched detector"""
+    detector = ZonePoseDetector(mode=detector_mode)
+    controllers = pose_controllers(hosts)
+    try:
+        if not all(controller.connect() for controller in controllers):
+            print("Failed to connect to ESP32.")
+            return False
+        return BatchedDetectorService(controllers, list(camera_indices), detector).run()
+    finally:
+        for controller in reversed(controllers):  # Shared links are closed by their owner, last
+            controller.close()
@@ -0,0 +1,248 @@
+import sys
+import threading
+import time
+from collections import deque
+
+import cv2
+
+sys.path.append("../")
+from ml_model.frame_source import open_source
+from .video_recorder import VideoRecorder
+
+
+class LatestQueue:
+    """Bounded queue that drops the oldest item instead of blocking the producer"""
+
+    def __init__(self, maxsize=1):
+        self.maxsize = maxsize
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+
+        # Counters exposed through PosePipeline.stats()
+        self.put_count = 0
+        self.drop_count = 0
+
+    def put(self, item):
+        with self.condition:
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()  # Stale item, the consumer never saw it
+                self.drop_count += 1
+            self.items.append(item)
+            self.put_count += 1
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest queued item, or None on timeout or once closed"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.items or self.closed, timeout)
+            if self.items:
+                return self.items.popleft()
+            return None
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def depth(self):
+        with self.condition:
+            return len(self.items)
+
+
+class StageStats:
+    """Per-stage counters: items processed and time spent doing work"""
+
+    def __init__(self):
+        self.processed = 0
+        self.busy_time = 0.0
+
+    def record(self, started):
+        self.processed += 1
+        self.busy_time += time.perf_counter() - started
+
+
+class PosePipeline:
+    """
+    Capture -> inference -> command -> display pipeline for a PoseController.
+
+    Each stage runs on its own thread (display stays on the calling thread,
+    which is what cv2.imshow expects) and stages are connected by
+    LatestQueues, so a slow ESP32 ack or a slow render never stalls the
+    next inference; stale frames are dropped instead.
+    """
+
+    STAGES = ("capture", "inference", "command", "display")
+
+    def __init__(self, controller, source=0, window_name="Fighting Pose Detection",
+                 stats_interval=5.0, display=True, video_dir=None, video_fps=30.0):
+        self.controller = controller
+        # A FrameSource, or a camera index / video file / image directory to open one for
+        self.source = open_source(source)
+        self.window_name = window_name
+        self.stats_interval = stats_interval
+        self.display = display
+
+        # Optional background recording of the annotated feed, one file per match
+        self.video = VideoRecorder(video_dir, video_fps) if video_dir else None
+
+        # The detector only needs to draw its overlay if someone watches or records it
+        controller.detector.render = display or self.video is not None
+
+        # Queue feeding each stage (capture has no input queue)
+        self.queues = {
+            "inference": LatestQueue(1),
+            "command": LatestQueue(1),
+            "display": LatestQueue(1),
+        }
+        self.stage_stats = {stage: StageStats() for stage in self.STAGES}
+        self.stop_event = threading.Event()
+
+        # Capture to pose latency, from each frame's capture timestamp
+        self.latency_total = 0.0
+        self.latency_count = 0
+
+    def capture_loop(self):
+        stats = self.stage_stats["capture"]
+        while not self.stop_event.is_set():
+            started = time.perf_counter()
+            frame, timestamp = self.source.read()
+            if frame is None:
+                if self.source.live:
+                    print("Error: Failed to capture frame.")
+                else:
+                    print("End of frame source.")
+                self.stop_event.set()
+                break
+            self.queues["inference"].put((frame, timestamp))
+            stats.record(started)
+
+    def inference_loop(self):
+        stats = self.stage_stats["inference"]
+        detector = self.controller.detector
+        while not self.stop_event.is_set():
+            item = self.queues["inference"].get(timeout=0.1)
+            if item is None:
+                continue
+
+            frame, timestamp = item
+            started = time.perf_counter()
+            annotated_frame, pose = detector.process_frame(frame, timestamp)
+            self.latency_total += time.perf_counter() - timestamp
+            self.latency_count += 1
+
+            if self.controller.update_pose(pose):
+                self.queues["command"].put(pose)
+
+            if self.display:
+                self.queues["display"].put(annotated_frame)
+            if self.video:
+                self.video.write(annotated_frame)
+            stats.record(started)
+
+    def command_loop(self):
+        stats = self.stage_stats["command"]
+        while not self.stop_event.is_set():
+            pose = self.queues["command"].get(timeout=0.1)
+            if pose is None:
+                continue
+
+            started = time.perf_counter()
+            self.controller.handle_pose(pose)
+            stats.record(started)
+
+    def display_loop(self):
+        stats = self.stage_stats["display"]
+        last_report = time.monotonic()
+        while not self.stop_event.is_set():
+            if self.display:
+                frame = self.queues["display"].get(timeout=0.05)
+                if frame is not None:
+                    started = time.perf_counter()
+                    cv2.imshow(self.window_name, frame)
+                    stats.record(started)
+
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q'):
+                    self.stop_event.set()
+                elif key == ord('n') and self.video:
+                    self.video.new_match()  # Next match goes to a new file
+            else:
+                # Headless: just wait for the other stages to stop
+                self.stop_event.wait(0.1)
+
+            if self.stats_interval and time.monotonic() - last_report >= self.stats_interval:
+                self.print_stats()
+                last_report = time.monotonic()
+
+    def stats(self):
+        """Return queue depth, drop count and timing for every stage"""
+        report = {}
+        for stage in self.STAGES:
+            stage_stats = self.stage_stats[stage]
+            queue = self.queues.get(stage)
+            report[stage] = {
+                "queue_depth": queue.depth() if queue else 0,
+                "dropped": queue.drop_count if queue else 0,
+                "processed": stage_stats.processed,
+                "avg_ms": (1000.0 * stage_stats.busy_time / stage_stats.processed
+                           if stage_stats.processed else 0.0),
+            }
+        return report
+
+    def print_stats(self):
+        for stage, values in self.stats().items():
+            print(f"[{stage:>9}] depth={values['queue_depth']} dropped={values['dropped']} "
+                  f"processed={values['processed']} avg={values['avg_ms']:.1f}ms")
+        if self.latency_count:
+            print(f"[  latency] capture to pose avg={1000.0 * self.latency_total / self.latency_count:.1f}ms")
+        if self.video:
+            print(f"[    video] written={self.video.written_count} dropped={self.video.drop_count}")
+        detector = self.controller.detector
+        if hasattr(detector, "suppressed_commands"):
+            print(f"[keypoints] held={detector.held_frames} "
+                  f"suppressed commands={detector.suppressed_commands}")
+        gate = getattr(detector, "gate", None)
+        if gate:
+            gate_stats = gate.stats()
+            print(f"[     gate] inferences={gate_stats['inferences']} "
+                  f"skipped static={gate_stats['skipped_static']} idle={gate_stats['skipped_idle']}")
+        scheduler = getattr(self.controller, "scheduler", None)
+        if scheduler:
+            servo_stats = scheduler.stats()
+            print(f"[   servos] sent={servo_stats['sent']} suppressed={servo_stats['suppressed']} "
+                  f"coalesced={servo_stats['coalesced']} deferred={servo_stats['deferred']}")
+
+    def run(self):
+        """Run until 'q' is pressed or the source stops; returns False if the source fails to open"""
+        if not self.source.open():
+            return False
+
+        if self.video:
+            self.video.start()
+
+        threads = [
+            threading.Thread(target=self.capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self.inference_loop, name="inference", daemon=True),
+            threading.Thread(target=self.command_loop, name="command", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            self.display_loop()
+        finally:
+            self.stop_event.set()
+            for queue in self.queues.values():
+                queue.close()
+            for thread in threads:
+                thread.join(timeout=2.0)
+            self.source.release()
+            if self.video:
+                self.video.close()
+            if hasattr(self.controller.detector, "close"):
+                self.controller.detector.close()
+            if self.display:
+                cv2.destroyAllWindows()
+            self.print_stats()
+        return True
@@ -0,0 +1,392 @@
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+
+import cv2
+
+sys.path.append("../")
+from ml_model import config
+from ml_model.classification import FightingPose
+from ml_model.frame_source import camera_settings, open_source
+from ml_model.lean_inference import draw_keypoints
+from ml_model.yolo_fightingpose_detection import ZonePoseDetector
+from .DualPoseController import pose_controllers
+from .frame_ring import SharedFrameRing
+from .pipeline import LatestQueue
+
+# Reader ids on each camera's frame ring
+INFERENCE_READER, DISPLAY_READER = 0, 1
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def parse_cores(text):
+    """Core list from "0-3,6" style text; empty text means every available core"""
+    if not text:
+        return available_cores()
+    cores = set()
+    for part in text.split(","):
+        first, _, last = part.strip().partition("-")
+        cores.update(range(int(first), int(last or first) + 1))
+    return sorted(cores)
+
+
+def split_cores(cores, workers):
+    """
+    Divide a core budget into one disjoint slice per inference worker.
+
+    When there are cores to spare, one is kept back for the capture
+    processes, display and commands; leftovers from an uneven split go there
+    too. Returns (per-worker core lists, spare cores). With fewer cores than
+    workers, workers share cores round-robin and nothing is spare.
+    """
+    cores = sorted(cores)
+    if len(cores) <= workers:
+        return [[cores[worker % len(cores)]] for worker in range(workers)], []
+    usable, spare = cores[:-1], cores[-1:]
+    per_worker = len(usable) // workers
+    slices = [usable[worker * per_worker:(worker + 1) * per_worker] for worker in range(workers)]
+    return slices, sorted(spare + usable[workers * per_worker:])
+
+
+def pin_to_cores(cores):
+    """Restrict this process to the given cores where the OS allows it"""
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+
+def capture_worker(source, condition, shapes, specs, go_event, stop_event, cores=None):
+    """Capture process: report the frame shape, then write frames into the ring the parent created for it"""
+    pin_to_cores(cores)
+    source = open_source(source, **camera_settings())
+    frame, timestamp = source.read() if source.open() else (None, None)
+    shapes.put(None if frame is None else frame.shape)
+    if frame is None:
+        source.release()
+        return
+
+    ring = SharedFrameRing.attach(specs.get(), condition)
+    go_event.wait()  # Don't start dropping frames before the models are loaded
+    # The first frame is as old as the model loading; a camera has a newer one
+    frame, timestamp = source.read() if source.live else (frame, time.perf_counter())
+    try:
+        while frame is not None and not stop_event.is_set():
+            ring.write(frame, timestamp)
+            frame, timestamp = source.read()
+    finally:
+        stop_event.set()  # End of a file source, or a camera failure, ends the session
+        source.release()
+        ring.close()
+
+
+def inference_worker(spec, condition, results, stop_event, detector_mode, cores=None):
+    """
+    Inference process: run the detector on the newest shared frame and send back only the result.
+
+    Pinned to its own cores, with as many intra-op threads as it has cores,
+    so two workers don't fight over the same ones.
+    """
+    pin_to_cores(cores)
+    ring = SharedFrameRing.attach(spec, condition)
+    detector = ZonePoseDetector(mode=detector_mode, threads=len(cores) if cores else config.INFERENCE_THREADS)
+    detector.render = False
+    results.put(time.process_time())  # Loaded and warmed up; CPU time so far is setup, not inference
+
+    sequence = 0
+    try:
+        while not stop_event.is_set():
+            acquired = ring.acquire(INFERENCE_READER, sequence, timeout=0.1)
+            if acquired is None:
+                continue
+            slot, newest, timestamp = acquired
+            skipped = newest - sequence - 1 if sequence else 0  # Not before our first frame
+            sequence = newest
+
+            started = time.perf_counter()
+            _, pose = detector.process_frame(ring.frame(slot), timestamp)
+            inference_ms = 1000.0 * (time.perf_counter() - started)
+            ring.release(INFERENCE_READER)
+
+            result = (sequence, timestamp, pose.value if pose else None, detector.player, inference_ms, skipped,
+                      time.process_time())
+            try:
+                results.put_nowait(result)
+            except queue.Full:
+                pass  # The parent is behind; it only needs the newest results anyway
+    finally:
+        ring.close()
+
+
+class ProcessPosePipeline:
+    """
+    Capture and inference in separate processes, one pair per camera.
+
+    Each camera's capture process writes frames into a shared memory ring
+    (see frame_ring.py) and that camera's inference process reads them in
+    place, so no frame is ever pickled or copied between processes. Only
+    the pose result (pose, player keypoints, timing) comes back to this
+    process over a small queue. Here, one thread per camera turns results
+    into commands for its PoseController, and the main thread shows the
+    newest frame of each camera with the returned keypoints drawn on it.
+    Camera decode, model inference and display no longer share one GIL.
+
+    This process also supervises the inference workers: each one gets its own
+    slice of the core budget (see split_cores), and a worker that dies is
+    restarted on the same ring, up to max_restarts times per camera.
+    """
+
+    def __init__(self, controllers, sources, detector_mode=config.DETECTOR_MODE, display=True,
+                 stats_interval=5.0, slots=4, cores=None, max_restarts=config.MAX_WORKER_RESTARTS):
+        if len(controllers) != len(sources):
+            raise ValueError("Need exactly one frame source per controller")
+        self.controllers = controllers
+        self.sources = sources
+        self.detector_mode = detector_mode
+        self.display = display
+        self.stats_interval = stats_interval
+        self.slots = slots
+        self.max_restarts = max_restarts
+
+        budget = parse_cores(config.CORE_BUDGET) if cores is None else cores
+        self.worker_cores, self.spare_cores = split_cores(budget, len(sources))
+
+        self.context = multiprocessing.get_context("spawn")  # Fresh interpreters: no forked torch or Qt state
+        self.stop_event = self.context.Event()
+        self.go_event = self.context.Event()
+        self.conditions = [self.context.Condition() for _ in sources]
+        self.results = [self.context.Queue(maxsize=4) for _ in sources]
+        self.command_queues = [LatestQueue(1) for _ in sources]
+        self.rings = [None for _ in sources]
+        self.latest_results = [None for _ in sources]
+        self.captures = [None for _ in sources]
+        self.workers = [None for _ in sources]
+
+        # Per-camera counters
+        self.result_counts = [0 for _ in sources]
+        self.skipped_frames = [0 for _ in sources]
+        self.inference_ms = [0.0 for _ in sources]
+        self.latency_ms = [0.0 for _ in sources]
+        self.cpu_seconds = [0.0 for _ in sources]
+        self.last_cpu_time = [0.0 for _ in sources]
+        self.restarts = [0 for _ in sources]
+        self.started = None
+
+    @property
+    def processes(self):
+        return [process for process in self.captures + self.workers if process is not None]
+
+    def start_worker(self, camera):
+        """Start (or restart) the inference process of a camera on its existing ring"""
+        worker = self.context.Process(target=inference_worker, name=f"inference-{camera}", daemon=True,
+                                      args=(self.rings[camera].spec, self.conditions[camera], self.results[camera],
+                                            self.stop_event, self.detector_mode, self.worker_cores[camera]))
+        worker.start()
+        self.workers[camera] = worker
+
+    def start_processes(self):
+        """
+        Start a capture process per source, create its frame ring here (so the
+        rings outlive every process using them), then start the inference
+        processes and let capture begin once all models are loaded.
+        Returns False on failure.
+        """
+        for camera, source in enumerate(self.sources):
+            shapes, specs = self.context.Queue(), self.context.Queue()
+            capture = self.context.Process(target=capture_worker, name=f"capture-{camera}", daemon=True,
+                                           args=(source, self.conditions[camera], shapes, specs, self.go_event,
+                                                 self.stop_event, self.spare_cores))
+            capture.start()
+            self.captures[camera] = capture
+            try:
+                shape = shapes.get(timeout=30.0)
+            except queue.Empty:
+                shape = None
+            if shape is None:
+                print(f"Error: Could not open frame source {source}.")
+                return False
+
+            self.rings[camera] = SharedFrameRing.create(shape, self.conditions[camera], slots=self.slots)
+            specs.put(self.rings[camera].spec)
+            self.start_worker(camera)
+            print(f"Camera {camera + 1}: inference on cores {self.worker_cores[camera]}")
+
+        for camera, results in enumerate(self.results):
+            try:
+                self.last_cpu_time[camera] = results.get(timeout=300.0)
+            except queue.Empty:
+                print(f"Error: The inference process for camera {camera + 1} did not start.")
+                return False
+        self.go_event.set()
+        return True
+
+    def result_loop(self, camera):
+        controller = self.controllers[camera]
+        while not self.stop_event.is_set():
+            try:
+                result = self.results[camera].get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if not isinstance(result, tuple):
+                self.last_cpu_time[camera] = result  # A restarted worker is ready; count from here
+                continue
+            _, timestamp, pose_value, _, inference_ms, skipped, cpu_time = result
+            self.latest_results[camera] = result
+            self.result_counts[camera] += 1
+            self.skipped_frames[camera] += skipped
+            self.inference_ms[camera] += inference_ms
+            self.latency_ms[camera] += 1000.0 * (time.perf_counter() - timestamp)
+            self.cpu_seconds[camera] += cpu_time - self.last_cpu_time[camera]
+            self.last_cpu_time[camera] = cpu_time
+
+            pose = FightingPose(pose_value) if pose_value else None
+            if controller.update_pose(pose):
+                self.command_queues[camera].put(pose)
+
+    def command_loop(self, camera):
+        controller = self.controllers[camera]
+        while not self.stop_event.is_set():
+            pose = self.command_queues[camera].get(timeout=0.1)
+            if pose is not None:
+                controller.handle_pose(pose)
+
+    def show(self, camera):
+        """Draw the latest result over a copy of the camera's newest frame"""
+        ring = self.rings[camera]
+        acquired = ring.acquire(DISPLAY_READER, timeout=0.01)
+        if acquired is None:
+            return
+        frame = ring.frame(acquired[0]).copy()
+        ring.release(DISPLAY_READER)
+
+        detector = self.controllers[camera].detector
+        if detector.left_boundary is None:
+            detector.setup_zones(frame.shape[1])
+        detector.draw_zones(frame)
+        result = self.latest_results[camera]
+        if result is not None:
+            pose_value, player = result[2], result[3]
+            if player is not None:
+                draw_keypoints(frame, player[0][None], player[1][None])
+            if pose_value:
+                cv2.putText(frame, f"Pose: {pose_value}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+        cv2.imshow(f"Fighting Pose Detection (camera {camera + 1})", frame)
+
+    def supervise(self):
+        """Restart dead inference workers; a stopped capture process ends the session"""
+        for camera, capture in enumerate(self.captures):
+            if not capture.is_alive():
+                print(f"Error: The capture process for camera {camera + 1} stopped.")
+                self.stop_event.set()
+                return
+        for camera, worker in enumerate(self.workers):
+            if worker.is_alive() or self.stop_event.is_set():
+                continue
+            if self.restarts[camera] >= self.max_restarts:
+                print(f"Error: The inference process for camera {camera + 1} keeps stopping.")
+                self.stop_event.set()
+                return
+            self.restarts[camera] += 1
+            print(f"Inference process for camera {camera + 1} stopped (exit code {worker.exitcode}); "
+                  f"restarting ({self.restarts[camera]}/{self.max_restarts})")
+            self.start_worker(camera)
+
+    def display_loop(self):
+        last_report = time.monotonic()
+        while not self.stop_event.is_set():
+            if self.display:
+                for camera in range(len(self.sources)):
+                    self.show(camera)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    self.stop_event.set()
+            else:
+                self.stop_event.wait(0.1)
+
+            self.supervise()
+
+            if self.stats_interval and time.monotonic() - last_report >= self.stats_interval:
+                self.print_stats()
+                last_report = time.monotonic()
+
+    def stats(self):
+        """
+        Per-camera result FPS, inference time, capture-to-result latency,
+        frames never inferred, and the inference worker's CPU use (percent of
+        one core) and restarts
+        """
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        report = []
+        for camera, count in enumerate(self.result_counts):
+            report.append({
+                "fps": count / elapsed if elapsed else 0.0,
+                "avg_inference_ms": self.inference_ms[camera] / count if count else 0.0,
+                "avg_latency_ms": self.latency_ms[camera] / count if count else 0.0,
+                "skipped": self.skipped_frames[camera],
+                "cpu_percent": 100.0 * self.cpu_seconds[camera] / elapsed if elapsed else 0.0,
+                "cores": len(self.worker_cores[camera]),
+                "restarts": self.restarts[camera],
+            })
+        return report
+
+    def print_stats(self):
+        for camera, values in enumerate(self.stats()):
+            print(f"[camera {camera + 1}] {values['fps']:.1f} FPS | inference {values['avg_inference_ms']:.1f}ms "
+                  f"| latency {values['avg_latency_ms']:.1f}ms | skipped frames {values['skipped']} "
+                  f"| CPU {values['cpu_percent']:.0f}% of {values['cores']} cores | restarts {values['restarts']}")
+            scheduler = getattr(self.controllers[camera], "scheduler", None)
+            if scheduler:
+                servo_stats = scheduler.stats()
+                print(f"[camera {camera + 1}] servos sent {servo_stats['sent']} | suppressed {servo_stats['suppressed']} "
+                      f"| coalesced {servo_stats['coalesced']} | deferred {servo_stats['deferred']}")
+
+    def run(self):
+        """Run until 'q' is pressed or a source stops; returns False if a source fails to open"""
+        threads = []
+        try:
+            if not self.start_processes():
+                return False
+            threads = [threading.Thread(target=self.result_loop, args=(camera,), daemon=True)
+                       for camera in range(len(self.sources))]
+            threads += [threading.Thread(target=self.command_loop, args=(camera,), daemon=True)
+                        for camera in range(len(self.sources))]
+            self.started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            self.display_loop()
+        finally:
+            self.stop_event.set()
+            for command_queue in self.command_queues:
+                command_queue.close()
+            for thread in threads:
+                thread.join(timeout=2.0)
+            for process in self.processes:
+                process.join(timeout=5.0)
+                if process.is_alive():
+                    process.terminate()
+            for ring in self.rings:
+                if ring:
+                    ring.close()  # Last user of each ring; this removes it
+            if self.display:
+                cv2.destroyAllWindows()
+            if self.started:
+                self.print_stats()
+        return True
+
+
+def run_process_players(sources=(0, 1), hosts=("192.168.4.1", "192.168.4.1"), detector_mode=config.DETECTOR_MODE):
+    """One capture and one inference process per camera, each camera driving its own robot"""
+    controllers = pose_controllers(hosts[:len(sources)])
+    try:
+        if not all(controller.connect() for controller in controllers):
+            print("Failed to connect to ESP32.")
+            return False
+        return ProcessPosePipeline(controllers, list(sources), detector_mode).run()
+    finally:
+        for controller in reversed(controllers):  # Shared links are closed by their owner, last
+            controller.close()
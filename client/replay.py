@@ -0,0 +1,121 @@
+import argparse
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+sys.path.append("../")
+from ml_model.classification import NO_POSE, pose_from_code
+from ml_model.frame_source import open_source
+from ml_model.recording import KeypointRecording
+from ml_model.yolo_fightingpose_detection import ZonePoseDetector
+from .PoseController import PoseController
+from .pipeline import PosePipeline
+
+
+class ReplayToyController(PoseController):
+    """PoseController that records servo commands instead of sending them to an ESP32"""
+
+    def __init__(self, toy_id=0, detector=None):
+        self.commands = []
+        super().__init__(toy_id=toy_id, detector=detector)
+        self.commands.clear()  # Drop the starting positions sent on construction
+        self.pose_changes = Counter()
+
+    def connect(self):
+        return True
+
+    def set_servo(self, toy_id, servo_type, angle):
+        self.commands.append((toy_id, servo_type, angle))
+        return True
+
+    def set_servos(self, commands):
+        self.commands.extend(commands)
+        return True
+
+    def update_pose(self, pose):
+        """Same as PoseController.update_pose, without printing every change"""
+        if pose and pose != self.current_pose:
+            self.current_pose = pose
+            self.pose_changes[pose] += 1
+            return True
+        return False
+
+
+def replay(recording, controller, realtime=False, max_gap=1.0):
+    """
+    Stream a recording through the controller's detector and handle_pose.
+
+    With realtime, frames are paced at their recorded timing (gaps longer
+    than max_gap, e.g. between appended sessions, are cut short); otherwise
+    they run as fast as possible. Returns the elapsed seconds.
+    """
+    detector = controller.detector
+    detector.render = False
+    detector.setup_zones(recording.width)
+    frame = np.zeros(recording.frame_shape, dtype=np.uint8)  # Only its shape is used
+
+    started = time.perf_counter()
+    clock = started
+    previous = None
+    for timestamp, detections in recording.frames():
+        if realtime and previous is not None:
+            clock += min(max(timestamp - previous, 0.0), max_gap)
+            delay = clock - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        previous = timestamp
+
+        _, pose = detector.process_detections(frame, detections, timestamp)
+        if controller.update_pose(pose):
+            controller.handle_pose(pose)
+    return time.perf_counter() - started
+
+
+def raw_pose_counts(recording, detector):
+    """Unsmoothed pose of every recorded first person, classified in one vectorized pass"""
+    rows = recording.rows[recording.rows["person"] == 0]
+    codes = detector.classify_poses(rows["keypoints"], rows["confidences"])
+    return Counter(pose_from_code(code) for code in codes[codes != NO_POSE].tolist())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a keypoint recording, or run a clip through the "
+                                                 "full pipeline, against a fake robot")
+    parser.add_argument("recording", nargs="?", help="File written with YOLO_BRAWLERS_RECORD")
+    parser.add_argument("--source", help="Video file or image directory to run through capture, inference "
+                                         "and commands instead (headless)")
+    parser.add_argument("--unpaced", action="store_true",
+                        help="With --source, read frames as fast as possible instead of at the clip's FPS")
+    parser.add_argument("--realtime", action="store_true", help="Pace frames at their recorded timing")
+    parser.add_argument("--toy-id", type=int, default=0, help="Which robot's servo angles to use")
+    args = parser.parse_args()
+    if not args.recording and not args.source:
+        parser.error("Give a recording or --source")
+
+    if args.source:
+        controller = ReplayToyController(args.toy_id, ZonePoseDetector())
+        pipeline = PosePipeline(controller, open_source(args.source, paced=not args.unpaced), display=False,
+                                stats_interval=0)
+        if not pipeline.run():
+            sys.exit(1)
+    else:
+        recording = KeypointRecording(args.recording)
+        controller = ReplayToyController(args.toy_id, ZonePoseDetector(load_model=False))
+        elapsed = replay(recording, controller, realtime=args.realtime)
+
+        print(f"Replayed {len(recording)} frames ({recording.duration:.1f}s recorded) in {elapsed:.2f}s "
+              f"({recording.duration / elapsed if elapsed else 0.0:.0f}x real time)")
+        raw_poses = raw_pose_counts(recording, controller.detector)
+        print("Raw poses:", {pose.value: count for pose, count in raw_poses.items()})
+
+    print("Pose changes:", {pose.value: count for pose, count in controller.pose_changes.items()})
+    print(f"Servo commands: {len(controller.commands)}")
+    stats = controller.detector.timing_stats()
+    print(f"Held frames: {stats['held_frames']}, suppressed commands: {stats['suppressed_commands']}, "
+          f"predicted poses: {stats['predicted_poses']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class ServoScheduler:
+    """
+    Shadow state of a robot's servos and the queue in front of its transport.
+
+    Every command is (toy_id, servo_type, angle). A command for the angle a
+    servo already has (or is already about to get) is a no-op and is
+    dropped. With a tick, commands are collected and sent once per tick,
+    only the newest target per servo, in one set_servos() call; with a
+    min_interval, a servo is sent at most that often and anything newer
+    waits for its turn. Both default to off (0), which sends every real
+    change straight away. Note that a tick longer than a punch would
+    swallow it: the trigger toggles out and back within the same tick.
+
+    `send` is the transport's set_servos; the shadow state only follows
+    commands it reported as sent. If it returns a Future (the async
+    transport), its commands count as in flight until the ack resolves it.
+    """
+
+    def __init__(self, send, tick=0.0, min_interval=0.0):
+        self.send = send
+        self.tick = tick
+        self.min_interval = min_interval
+
+        self.lock = threading.Condition()
+        self.send_lock = threading.Lock()  # Keeps flushes from different threads in order
+        self.shadow = {}  # (toy_id, servo_type) -> last angle sent
+        self.pending = {}  # (toy_id, servo_type) -> newest angle not sent yet
+        self.in_flight = {}  # (toy_id, servo_type) -> angle sent but not acked yet
+        self.last_sent = {}  # (toy_id, servo_type) -> time.monotonic() of the last send
+        self.thread = None
+        self.stop_event = threading.Event()
+
+        # Counters exposed through stats()
+        self.sent_count = 0
+        self.suppressed_count = 0  # No-ops
+        self.coalesced_count = 0  # Replaced by a newer target before they were sent
+        self.deferred_count = 0  # Held back by the per-servo rate limit
+        self.failed_count = 0
+
+    def submit(self, commands):
+        """
+        Queue servo commands; returns what the transport returned if they
+        were sent right away, otherwise True
+        """
+        now = time.monotonic()
+        with self.lock:
+            for toy_id, servo_type, angle in commands:
+                key = (toy_id, servo_type)
+                if angle == self.pending.get(key, self.in_flight.get(key, self.shadow.get(key))):
+                    self.suppressed_count += 1
+                    continue
+                if key in self.pending:
+                    self.coalesced_count += 1
+                elif not self.due(key, now):
+                    self.deferred_count += 1
+                self.pending[key] = angle
+            if not self.pending:
+                return True
+
+        if not self.tick:
+            result = self.flush()
+            if not self.pending:
+                return result
+        self.wake()
+        return True
+
+    def due(self, key, now):
+        return now - self.last_sent.get(key, float("-inf")) >= self.min_interval
+
+    def flush(self):
+        """Send every pending target whose servo may move now"""
+        with self.send_lock:
+            now = time.monotonic()
+            with self.lock:
+                ready = [key for key in self.pending if self.due(key, now)]
+                commands = [key + (self.pending.pop(key),) for key in ready]
+            if not commands:
+                return True
+
+            with self.lock:
+                for toy_id, servo_type, angle in commands:
+                    self.in_flight[(toy_id, servo_type)] = angle
+                    self.last_sent[(toy_id, servo_type)] = now
+            result = self.send(commands)
+            if isinstance(result, Future):
+                result.add_done_callback(lambda future: self.settle(commands, self.succeeded(future)))
+            else:
+                self.settle(commands, result)
+            return result
+
+    @staticmethod
+    def succeeded(future):
+        return not future.cancelled() and future.exception() is None and bool(future.result())
+
+    def settle(self, commands, sent):
+        """Record the outcome of a send: the shadow state follows it only if it succeeded"""
+        with self.lock:
+            for toy_id, servo_type, angle in commands:
+                key = (toy_id, servo_type)
+                if self.in_flight.get(key) == angle:
+                    del self.in_flight[key]
+                if sent:
+                    self.shadow[key] = angle
+                else:
+                    self.shadow.pop(key, None)  # Unknown now; the next command for it goes out
+            if sent:
+                self.sent_count += len(commands)
+            else:
+                self.failed_count += len(commands)
+
+    def next_flush(self):
+        """Seconds until a rate-limited servo may move, None if nothing is pending"""
+        if not self.pending:
+            return None
+        now = time.monotonic()
+        return max(0.0, min(self.last_sent.get(key, now) + self.min_interval - now for key in self.pending))
+
+    def wake(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="servo-scheduler", daemon=True)
+                self.thread.start()
+            self.lock.notify()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            if self.tick:
+                self.stop_event.wait(self.tick)  # Fixed ticks; submit() doesn't cut them short
+            else:
+                with self.lock:
+                    self.lock.wait(self.next_flush())
+            if self.pending and not self.stop_event.is_set():
+                self.flush()
+
+    def stats(self):
+        """Commands sent, dropped as no-ops, replaced before sending, and held back by the rate limit"""
+        with self.lock:
+            return {"sent": self.sent_count, "suppressed": self.suppressed_count, "coalesced": self.coalesced_count,
+                    "deferred": self.deferred_count, "failed": self.failed_count, "pending": len(self.pending),
+                    "in_flight": len(self.in_flight)}
+
+    def close(self):
+        """Send whatever is still pending, then stop the flush thread"""
+        self.flush()
+        self.stop_event.set()
+        if self.thread is not None:
+            with self.lock:
+                self.lock.notify()
+            self.thread.join()
+            self.thread = None
@@ -0,0 +1,107 @@
+import random
+import socket
+import struct
+import sys
+import threading
+
+sys.path.append("../")
+from ml_model import config
+from .PoseController import PoseController
+from .controller import SERVO_NAMES, ToyController
+
+# Full desired state of one toy per datagram (see CommandProcessor.h):
+# magic, version, session, sequence, toy_id, trigger1, trigger2, weave
+SERVO_STATE_DATAGRAM = 0xF2
+SERVO_STATE_VERSION = 1
+SERVO_STATE_FORMAT = "<BBHIB3B"
+ANGLE_UNCHANGED = 0xFF
+
+
+class UdpToyController(ToyController):
+    """
+    ToyController that sends servo setpoints as latest-wins UDP datagrams.
+
+    Every datagram carries the whole desired state of a toy (all three
+    servos) with a sequence number, and the ESP32 ignores any datagram older
+    than the newest it has seen, so a lost or reordered packet never moves a
+    servo backwards and there is nothing to wait for: no connection, no acks,
+    no head-of-line blocking. A background thread resends the current state
+    every resend_interval seconds, which repairs lost datagrams. The session
+    id is random per controller, so the ESP32 starts over when the client
+    restarts.
+    """
+
+    def __init__(self, *args, udp_port=config.UDP_PORT, resend_interval=config.UDP_RESEND_INTERVAL, **kwargs):
+        self.udp_port = udp_port
+        self.resend_interval = resend_interval
+        self.session = random.getrandbits(16)
+        self.sequence = 0
+        self.states = {}  # toy_id -> [trigger1, trigger2, weave] angles
+        self.lock = threading.Lock()
+        self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        # Counters exposed through stats()
+        self.sent_count = 0
+        self.resent_count = 0
+        self.failed_count = 0
+
+        self.stop_event = threading.Event()
+        self.resend_thread = threading.Thread(target=self.resend_loop, name="udp-resend", daemon=True)
+        self.resend_thread.start()
+        super().__init__(*args, **kwargs)
+
+    def connect(self):
+        print(f"Sending servo datagrams to {self.host}:{self.udp_port}")
+        return True
+
+    def send_state(self, toy_id):
+        """Send the toy's current desired state as the next datagram; call with the lock held"""
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+        datagram = struct.pack(SERVO_STATE_FORMAT, SERVO_STATE_DATAGRAM, SERVO_STATE_VERSION, self.session,
+                               self.sequence, toy_id, *self.states[toy_id])
+        try:
+            self.udp_socket.sendto(datagram, (self.host, self.udp_port))
+            self.sent_count += 1
+            return True
+        except OSError as e:
+            print(f"Failed to set servo: {e}")
+            self.failed_count += 1
+            return False
+
+    def set_servo(self, toy_id, servo_type, angle):
+        return self.set_servos([(toy_id, servo_type, angle)])
+
+    def set_servos(self, commands):
+        """Update the desired angles and send one datagram per toy they touch"""
+        with self.lock:
+            toys = []
+            for toy_id, servo_type, angle in commands:
+                self.states.setdefault(toy_id, [ANGLE_UNCHANGED] * len(SERVO_NAMES))[servo_type] = angle
+                if toy_id not in toys:
+                    toys.append(toy_id)
+            sent = all([self.send_state(toy_id) for toy_id in toys])
+        if sent:
+            print(", ".join(f"Toy{toy_id + 1} {SERVO_NAMES[servo_type]} set to {angle} degrees"
+                            for toy_id, servo_type, angle in commands))
+        return sent
+
+    def resend_loop(self):
+        while not self.stop_event.wait(self.resend_interval):
+            with self.lock:
+                for toy_id in self.states:
+                    if self.send_state(toy_id):
+                        self.resent_count += 1
+
+    def stats(self):
+        """Datagrams sent (including periodic resends) and failed sends"""
+        return {"sent": self.sent_count, "resent": self.resent_count, "failed": self.failed_count}
+
+    def close(self):
+        self.scheduler.close()
+        self.stop_event.set()
+        self.resend_thread.join()
+        self.udp_socket.close()
+
+
+class UdpPoseController(UdpToyController, PoseController):
+    """PoseController whose servo commands go out as latest-wins datagrams (see UdpToyController)"""
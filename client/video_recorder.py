@@ -0,0 +1,80 @@
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+
+class VideoRecorder:
+    """
+    Saves the annotated feed to disk without slowing the pipeline.
+
+    write() only puts the frame into a bounded buffer; a background thread
+    does the encoding. If the encoder falls behind and the buffer is full,
+    the new frame is dropped and counted, so the caller never waits on the
+    disk. Each match goes to its own file: new_match() starts the next one
+    (the first frame written opens the first file).
+    """
+
+    def __init__(self, directory, fps=30.0, fourcc="mp4v", extension="mp4", buffer_size=64):
+        self.directory = directory
+        self.fps = fps
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.extension = extension
+        self.buffer = queue.Queue(maxsize=buffer_size)
+
+        self.match = 0
+        self.path = None
+        self.thread = None
+
+        # Counters reported alongside the pipeline stats
+        self.written_count = 0
+        self.drop_count = 0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.new_match()
+        self.thread = threading.Thread(target=self.encode_loop, name="video", daemon=True)
+        self.thread.start()
+
+    def new_match(self):
+        """Send the following frames to a new file"""
+        self.match += 1
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        self.path = os.path.join(self.directory, f"match_{stamp}_{self.match:02d}.{self.extension}")
+
+    def write(self, frame):
+        """Queue a frame for encoding; returns False if it had to be dropped"""
+        try:
+            self.buffer.put_nowait((self.path, frame))
+            return True
+        except queue.Full:
+            self.drop_count += 1
+            return False
+
+    def encode_loop(self):
+        writer, path = None, None
+        while True:
+            item = self.buffer.get()
+            if item is None:
+                break
+            frame_path, frame = item
+            if frame_path != path:
+                if writer:
+                    writer.release()
+                height, width = frame.shape[:2]
+                writer = cv2.VideoWriter(frame_path, self.fourcc, self.fps, (width, height))
+                path = frame_path
+                print(f"Recording video to {path}")
+            writer.write(frame)
+            self.written_count += 1
+        if writer:
+            writer.release()
+
+    def close(self):
+        """Finish encoding whatever is buffered and close the current file"""
+        if self.thread:
+            self.buffer.put(None)
+            self.thread.join()
+            self.thread = None
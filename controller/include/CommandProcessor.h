@@ -7,13 +7,53 @@ struct ServoCommand {
   uint8_t angle;      // 0-180
 };
 
+// Network frames:
+//   [toy_id, servo_type, angle]                          acked with "OK"
+//   [MULTI_SERVO_FRAME, count, count x (toy_id, servo_type, angle)]
+//                                    acked with 1 byte: the number of servos set
+//   [MULTI_SERVO_FRAME, 0]           ping, acked with 1 byte: 0
+// MULTI_SERVO_FRAME is never a valid toy_id, so the first byte tells them apart.
+#define MULTI_SERVO_FRAME 0xF1
+#define MAX_FRAME_SERVOS TOTAL_SERVOS
+#define MAX_FRAME_LENGTH (2 + 3 * MAX_FRAME_SERVOS)
+#define MAX_ACK_LENGTH 2
+
+// UDP datagram with the full desired state of one toy, never acked:
+//   [SERVO_STATE_DATAGRAM, version, session (u16 LE), sequence (u32 LE),
+//    toy_id, trigger1, trigger2, weave]
+// An angle of ANGLE_UNCHANGED leaves that servo alone. Datagrams older than
+// the newest one seen from the same session are dropped (latest wins). A new
+// session only takes over a toy once the current one has sent nothing for
+// SESSION_TAKEOVER_MS, so a stale client that keeps resending can't fight a
+// new one for the servos (clients resend every 100 ms while alive).
+#define SERVO_STATE_DATAGRAM 0xF2
+#define SERVO_STATE_VERSION 1
+#define SERVO_STATE_LENGTH 12
+#define ANGLE_UNCHANGED 0xFF
+#define SESSION_TAKEOVER_MS 500
+
 class CommandProcessor {
 public:
   CommandProcessor(ServoManager &servo_manager);
   void processSerialCommand(const String &command);
-  void processNetworkCommand(uint8_t *buffer, size_t length);
+  // Length of the frame starting in buffer, or 0 if more bytes are needed to tell
+  static size_t networkFrameLength(const uint8_t *buffer, size_t length);
+  // Executes one complete frame and writes its ack; returns the ack length
+  // (0 for a malformed frame)
+  size_t processNetworkCommand(uint8_t *buffer, size_t length, uint8_t *ack);
+  // Applies a servo state datagram; returns false if it was malformed or stale
+  bool processDatagram(const uint8_t *buffer, size_t length);
 
 private:
+  struct DatagramStream {
+    bool active;
+    uint16_t session;
+    uint32_t sequence;
+    uint32_t last_seen; // millis() of its last datagram
+    uint8_t angles[TRIGGERS_PER_TOY + 1];
+  };
+
   ServoManager &servo_manager;
-  void executeCommand(const ServoCommand &cmd);
+  DatagramStream streams[TOTAL_TOYS] = {};
+  bool executeCommand(const ServoCommand &cmd);
 };
\ No newline at end of file
@@ -2,14 +2,17 @@
 #include "CommandProcessor.h"
 #include "config.h"
 #include <WiFi.h>
+#include <WiFiUdp.h>
 
 class NetworkManager {
 public:
   NetworkManager(CommandProcessor &command_processor);
   void init();
   void handleClients();
+  void handleDatagrams();
 
 private:
   WiFiServer server;
+  WiFiUDP udp;
   CommandProcessor &command_processor;
 };
\ No newline at end of file
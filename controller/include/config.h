@@ -4,6 +4,7 @@
 extern const char *WIFI_SSID;
 extern const char *WIFI_PASSWORD;
 extern const int WIFI_PORT;
+extern const int WIFI_UDP_PORT;
 
 // Servo Configuration
 #define TOTAL_TOYS 2
@@ -34,15 +34,92 @@ void CommandProcessor::processSerialCommand(const String &command) {
   executeCommand(cmd);
 }
 
-void CommandProcessor::processNetworkCommand(uint8_t *buffer, size_t length) {
-  if (length != 3)
-    return;
+size_t CommandProcessor::networkFrameLength(const uint8_t *buffer,
+                                            size_t length) {
+  if (length < 1)
+    return 0;
+  if (buffer[0] != MULTI_SERVO_FRAME)
+    return 3;
+  if (length < 2)
+    return 0;
+  return 2 + 3 * buffer[1];
+}
 
-  ServoCommand cmd = {
-      .toy_id = buffer[0], .servo_type = buffer[1], .angle = buffer[2]};
-  executeCommand(cmd);
+size_t CommandProcessor::processNetworkCommand(uint8_t *buffer, size_t length,
+                                               uint8_t *ack) {
+  if (length != networkFrameLength(buffer, length))
+    return 0;
+
+  if (buffer[0] != MULTI_SERVO_FRAME) {
+    ServoCommand cmd = {
+        .toy_id = buffer[0], .servo_type = buffer[1], .angle = buffer[2]};
+    executeCommand(cmd);
+    ack[0] = 'O';
+    ack[1] = 'K';
+    return 2;
+  }
+
+  // A frame without commands is a ping from the client's connection check
+  uint8_t count = buffer[1];
+  if (count > MAX_FRAME_SERVOS)
+    return 0;
+
+  uint8_t applied = 0;
+  for (uint8_t i = 0; i < count; i++) {
+    const uint8_t *triple = buffer + 2 + 3 * i;
+    ServoCommand cmd = {
+        .toy_id = triple[0], .servo_type = triple[1], .angle = triple[2]};
+    if (executeCommand(cmd))
+      applied++;
+  }
+  ack[0] = applied;
+  return 1;
+}
+
+bool CommandProcessor::processDatagram(const uint8_t *buffer, size_t length) {
+  if (length != SERVO_STATE_LENGTH || buffer[0] != SERVO_STATE_DATAGRAM ||
+      buffer[1] != SERVO_STATE_VERSION)
+    return false;
+
+  uint16_t session = buffer[2] | (buffer[3] << 8);
+  uint32_t sequence = buffer[4] | (buffer[5] << 8) |
+                      ((uint32_t)buffer[6] << 16) | ((uint32_t)buffer[7] << 24);
+  uint8_t toy_id = buffer[8];
+  if (toy_id >= TOTAL_TOYS)
+    return false;
+
+  // A new session (client restart) starts over once the current one has
+  // gone quiet; within a session only datagrams newer than the last one
+  // count (wrap-around safe)
+  DatagramStream &stream = streams[toy_id];
+  uint32_t now = millis();
+  bool same_session = stream.active && stream.session == session;
+  if (same_session)
+    stream.last_seen = now;
+  else if (stream.active && now - stream.last_seen < SESSION_TAKEOVER_MS)
+    return false;
+  if (same_session && (int32_t)(sequence - stream.sequence) <= 0)
+    return false;
+
+  for (uint8_t servo_type = 0; servo_type <= TRIGGERS_PER_TOY; servo_type++) {
+    uint8_t angle = buffer[9 + servo_type];
+    // Periodic resends repeat the state; only move servos that changed
+    if (angle == ANGLE_UNCHANGED ||
+        (same_session && angle == stream.angles[servo_type]))
+      continue;
+    ServoCommand cmd = {
+        .toy_id = toy_id, .servo_type = servo_type, .angle = angle};
+    executeCommand(cmd);
+  }
+
+  stream.active = true;
+  stream.session = session;
+  stream.sequence = sequence;
+  stream.last_seen = now;
+  memcpy(stream.angles, buffer + 9, sizeof(stream.angles));
+  return true;
 }
 
-void CommandProcessor::executeCommand(const ServoCommand &cmd) {
-  servo_manager.setServoAngle(cmd.toy_id, cmd.servo_type, cmd.angle);
+bool CommandProcessor::executeCommand(const ServoCommand &cmd) {
+  return servo_manager.setServoAngle(cmd.toy_id, cmd.servo_type, cmd.angle);
 }
\ No newline at end of file
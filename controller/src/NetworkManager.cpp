@@ -9,22 +9,57 @@ void NetworkManager::init() {
   Serial.print("IP Address: ");
   Serial.println(WiFi.softAPIP());
   server.begin();
+  udp.begin(WIFI_UDP_PORT);
+}
+
+void NetworkManager::handleDatagrams() {
+  while (udp.parsePacket() > 0) {
+    uint8_t buffer[SERVO_STATE_LENGTH];
+    int length = udp.read(buffer, sizeof(buffer));
+    // Oversized datagrams are ignored; the next parsePacket() drops the rest
+    if (length > 0 && udp.available() == 0)
+      command_processor.processDatagram(buffer, length);
+  }
 }
 
 void NetworkManager::handleClients() {
+  handleDatagrams();
   WiFiClient client = server.available();
   if (client) {
     Serial.println("New client connected");
+    uint8_t buffer[MAX_FRAME_LENGTH];
+    size_t buffered = 0;
     while (client.connected()) {
-      if (client.available() >= 3) {
-        uint8_t buffer[3];
-        size_t bytesRead = client.read(buffer, 3);
-        if (bytesRead == 3) {
-          command_processor.processNetworkCommand(buffer, bytesRead);
-          client.write("OK");
+      handleDatagrams(); // Both transports can be in use at the same time
+      if (client.available() > 0) {
+        // Read up to the end of the frame, or one more byte while its length
+        // is still unknown, so frames sent back to back are never mixed
+        size_t needed = CommandProcessor::networkFrameLength(buffer, buffered);
+        if (needed == 0)
+          needed = buffered + 1;
+        if (needed > MAX_FRAME_LENGTH) {
+          Serial.println("Invalid frame");
+          break;
+        }
+        int bytesRead = client.read(buffer + buffered, needed - buffered);
+        if (bytesRead > 0)
+          buffered += bytesRead;
+
+        if (buffered ==
+            CommandProcessor::networkFrameLength(buffer, buffered)) {
+          uint8_t ack[MAX_ACK_LENGTH];
+          size_t ackLength =
+              command_processor.processNetworkCommand(buffer, buffered, ack);
+          if (ackLength == 0) {
+            Serial.println("Invalid frame");
+            break;
+          }
+          client.write(ack, ackLength);
+          buffered = 0;
         }
+      } else {
+        delay(1);
       }
-      delay(1);
     }
     client.stop();
     Serial.println("Client disconnected");
@@ -4,4 +4,5 @@
 // const char *WIFI_SSID = "ESP32_Servo_Control_Red";
 const char *WIFI_SSID = "ESP32_Servo_Control_Blue";
 const char *WIFI_PASSWORD = "your_password_here";
-const int WIFI_PORT = 8080;
\ No newline at end of file
+const int WIFI_PORT = 8080;
+const int WIFI_UDP_PORT = 8081;
\ No newline at end of file
@@ -0,0 +1,171 @@
+import shutil
+from pathlib import Path
+
+
+def exported_path(weights, export_format, imgsz=640):
+    """Where the export of these weights at this input size is kept"""
+    weights = Path(weights)
+    stem = f"{weights.stem}_{imgsz}"  # Exported graphs are traced at a fixed size
+    if export_format == "openvino":
+        return weights.parent / f"{stem}_openvino_model" / f"{weights.stem}.xml"
+    return weights.with_name(f"{stem}.{export_format}")
+
+
+def export_model(weights, export_format, imgsz=640):
+    """Export the .pt weights to export_format at imgsz unless that was already done"""
+    path = exported_path(weights, export_format, imgsz)
+    if not path.exists():
+        from ultralytics import YOLO
+
+        print(f"Exporting {weights} to {export_format} at {imgsz}px (first use only)...")
+        exported = YOLO(str(weights)).export(format=export_format, imgsz=imgsz)
+        # Ultralytics names the export after the weights alone; keep it under its input size
+        target = path.parent if export_format == "openvino" else path
+        if target.is_dir():
+            shutil.rmtree(target)
+        shutil.move(str(exported), str(target))
+    return path
+
+
+class PoseBackend:
+    """
+    Runs the pose network on a preprocessed float32 (batch, 3, H, W) blob and
+    returns the raw (batch, 4 + classes + 17 * 3, anchors) prediction.
+
+    Every backend produces the same raw tensor, so decoding (and therefore
+    classify_pose) does not depend on which one is selected.
+    """
+
+    name = None
+    export_format = None  # Ultralytics export format, None for the .pt weights
+
+    # Exported graphs only accept the square imgsz, batch 1 input they were traced with
+    fixed_shape = True
+    supports_batch = False
+
+    def __init__(self, weights, device="cpu", imgsz=640, threads=0):
+        self.weights = weights
+        self.device = device
+        self.imgsz = imgsz
+        self.threads = threads  # Intra-op threads, 0 for the runtime's default
+        self.path = self.model_path(weights, imgsz)
+        self.load()
+
+    @classmethod
+    def model_path(cls, weights, imgsz=640):
+        """Model file this backend loads, exporting it first if needed"""
+        if cls.export_format is None:
+            return weights
+        return export_model(weights, cls.export_format, imgsz)
+
+    def load(self):
+        raise NotImplementedError
+
+    def infer(self, blob):
+        raise NotImplementedError
+
+
+class TorchBackend(PoseBackend):
+    """Eager PyTorch, the same network the Ultralytics predictor runs"""
+
+    name = "torch"
+    fixed_shape = False
+    supports_batch = True
+
+    def load(self):
+        from ultralytics import YOLO
+
+        self.yolo = YOLO(str(self.path))
+        self.yolo.to(self.device)
+        self.net = self.yolo.model.fuse(verbose=False).eval()
+
+    def infer(self, blob):
+        import torch
+
+        with torch.inference_mode():
+            preds = self.net(torch.from_numpy(blob).to(self.device))
+        if isinstance(preds, (list, tuple)):
+            preds = preds[0]
+        return preds.cpu().numpy()  # The only device->host copy
+
+
+class TorchScriptBackend(TorchBackend):
+    name = "torchscript"
+    export_format = "torchscript"
+    fixed_shape = True
+    supports_batch = False
+
+    def load(self):
+        import torch
+
+        self.net = torch.jit.load(str(self.path), map_location=self.device).eval()
+
+
+class OnnxBackend(PoseBackend):
+    name = "onnx"
+    export_format = "onnx"
+
+    def load(self):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("The onnx backend needs onnxruntime: pip install onnxruntime")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+        self.session = ort.InferenceSession(str(self.path), options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def infer(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OnnxInt8Backend(OnnxBackend):
+    """ONNX Runtime on an INT8 quantized export (see quantization.py)"""
+
+    name = "onnx-int8"
+
+    @classmethod
+    def model_path(cls, weights, imgsz=640):
+        from ml_model import config
+        from ml_model.quantization import quantize_model
+
+        return quantize_model(export_model(weights, "onnx", imgsz),
+                              calibration=config.QUANTIZATION_CALIBRATION, imgsz=imgsz)
+
+
+class OpenVINOBackend(PoseBackend):
+    name = "openvino"
+    export_format = "openvino"
+
+    def load(self):
+        try:
+            import openvino as ov
+        except ImportError:
+            raise ImportError("The openvino backend needs openvino: pip install openvino")
+
+        core = ov.Core()
+        properties = {"PERFORMANCE_HINT": "LATENCY"}
+        if self.threads:
+            properties["INFERENCE_NUM_THREADS"] = self.threads
+        self.compiled = core.compile_model(str(self.path), "CPU", properties)
+        self.output = self.compiled.output(0)
+
+    def infer(self, blob):
+        return self.compiled([blob])[self.output]
+
+
+BACKENDS = {backend.name: backend for backend in
+            (TorchBackend, TorchScriptBackend, OnnxBackend, OnnxInt8Backend, OpenVINOBackend)}
+
+
+def create_backend(name, weights, device="cpu", imgsz=640, threads=0):
+    """Instantiate the backend registered under name (see BACKENDS)"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {name} (choose from {', '.join(BACKENDS)})")
+    if name != "torch":
+        device = "cpu"  # Exported graphs run on the CPU providers
+    return BACKENDS[name](weights, device=device, imgsz=imgsz, threads=threads)
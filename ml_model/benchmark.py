@@ -0,0 +1,63 @@
+import argparse
+import sys
+
+sys.path.append("../")
+from ml_model.backends import BACKENDS
+from ml_model.frame_source import open_source
+from ml_model.yolo_fightingpose_detection import ZonePoseDetector
+
+
+def load_frames(source, max_frames):
+    """Read up to max_frames frames from a video file, image directory or camera index"""
+    source = open_source(str(source), paced=False)
+    if not source.open():
+        return []
+    frames = []
+    for frame, _ in source:
+        frames.append(frame)
+        if len(frames) >= max_frames:
+            break
+    source.release()
+    return frames
+
+
+def benchmark_detector(detector, frames, warmup=5):
+    """Run the detector over copies of the frames and return its timing stats"""
+    for frame in frames[:warmup]:
+        detector.process_frame(frame.copy())
+    detector.frame_count = 0
+    detector.total_frame_time = 0.0
+    detector.total_cpu_time = 0.0
+
+    for frame in frames:
+        detector.process_frame(frame.copy())
+    return detector.timing_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-frame cost of detector modes and backends")
+    parser.add_argument("source", help="Video file or camera index")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--modes", nargs="+", default=list(ZonePoseDetector.MODES),
+                        choices=ZonePoseDetector.MODES)
+    parser.add_argument("--backends", nargs="+", default=["torch"], choices=list(BACKENDS))
+    parser.add_argument("--no-render", action="store_true",
+                        help="Benchmark without drawing the overlay (headless)")
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.frames)
+    if not frames:
+        print("Error: Could not read any frames.")
+        sys.exit(1)
+
+    for backend in args.backends:
+        for mode in args.modes:
+            detector = ZonePoseDetector(mode=mode, backend=backend)
+            detector.render = not args.no_render
+            stats = benchmark_detector(detector, frames)
+            print(f"{mode:>8}/{backend:<11}: {stats['frames']} frames, {stats['avg_ms']:.1f} ms/frame, "
+                  f"{stats['avg_cpu_ms']:.1f} ms CPU/frame")
+
+
+if __name__ == "__main__":
+    main()
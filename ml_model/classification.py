@@ -0,0 +1,73 @@
+from enum import Enum
+
+import numpy as np
+
+
+class FightingPose(Enum):
+    GUARD = "guard"
+    WEAVE_RIGHT = "weave_right"
+    WEAVE_LEFT = "weave_left"
+    PUNCH_RIGHT = "punch_right"
+    PUNCH_LEFT = "punch_left"
+
+
+# Poses as small integer codes, so whole arrays of them fit in an int8 array;
+# NO_POSE marks a person whose pose can't be decided from reliable keypoints
+POSES = list(FightingPose)
+POSE_CODES = {pose: code for code, pose in enumerate(POSES)}
+NO_POSE = -1
+
+ZONE_LEFT, ZONE_CENTER, ZONE_RIGHT, ZONE_NONE = 0, 1, 2, -1
+
+
+def pose_from_code(code):
+    """FightingPose for a pose code, or None for NO_POSE"""
+    return None if code == NO_POSE else POSES[code]
+
+
+def zones(x, left_boundary, right_boundary, buffer=0):
+    """Zone of every x coordinate; points inside a buffer zone get ZONE_NONE"""
+    center = (x >= left_boundary + buffer) & (x <= right_boundary - buffer)
+    return np.where(x < left_boundary - buffer, ZONE_LEFT,
+                    np.where(x > right_boundary + buffer, ZONE_RIGHT,
+                             np.where(center, ZONE_CENTER, ZONE_NONE)))
+
+
+def classify_keypoints(keypoints, left_boundary, right_boundary, buffer=0,
+                       confidences=None, min_confidence=0.5):
+    """
+    Pose codes for any number of people at once.
+
+    keypoints is a (..., 17, 2) array, e.g. frames x people x 17 x 2, and
+    confidences (optional) the matching (..., 17) array. Returns an int8
+    array of pose codes with the leading shape of keypoints. The rules are
+    the zone rules of ZonePoseDetector.classify_pose: a face outside the
+    middle zone is a weave, a wrist across into the opposite zone is a
+    punch, anything else is guard, and NO_POSE when a weave or punch can't
+    be ruled out because the face or a wrist is below min_confidence.
+    """
+    keypoints = np.asarray(keypoints, dtype=np.float32)
+    if confidences is None:
+        reliable = np.ones(keypoints.shape[:-1], dtype=bool)
+    else:
+        reliable = np.asarray(confidences) >= min_confidence
+
+    # Face position is the mean x of the reliable nose and eyes
+    face_reliable = reliable[..., :3]
+    face_count = face_reliable.sum(axis=-1)
+    face_x = (keypoints[..., :3, 0] * face_reliable).sum(axis=-1) / np.maximum(face_count, 1)
+    face_zone = np.where(face_count > 0, zones(face_x, left_boundary, right_boundary, buffer), ZONE_NONE)
+
+    left_wrist, right_wrist = reliable[..., 9], reliable[..., 10]
+    left_hand_zone = np.where(left_wrist, zones(keypoints[..., 9, 0], left_boundary, right_boundary, buffer),
+                              ZONE_NONE)
+    right_hand_zone = np.where(right_wrist, zones(keypoints[..., 10, 0], left_boundary, right_boundary, buffer),
+                               ZONE_NONE)
+
+    # Nested in reverse priority order: weaves beat punches, punches beat guard
+    codes = np.where((face_count == 0) | ~left_wrist | ~right_wrist, NO_POSE, POSE_CODES[FightingPose.GUARD])
+    codes = np.where(right_hand_zone == ZONE_LEFT, POSE_CODES[FightingPose.PUNCH_LEFT], codes)
+    codes = np.where(left_hand_zone == ZONE_RIGHT, POSE_CODES[FightingPose.PUNCH_RIGHT], codes)
+    codes = np.where(face_zone == ZONE_RIGHT, POSE_CODES[FightingPose.WEAVE_RIGHT], codes)
+    codes = np.where(face_zone == ZONE_LEFT, POSE_CODES[FightingPose.WEAVE_LEFT], codes)
+    return codes.astype(np.int8)
@@ -0,0 +1,122 @@
+import os
+
+# Detector configuration. Every value can be overridden with an environment
+# variable so the UI and the client scripts pick up the same settings.
+
+# Paths are relative to the UI/ and client/ directories the apps are run from
+MODEL_PATH = os.environ.get("YOLO_BRAWLERS_MODEL", "../model_assets/yolo11n-pose.pt")
+
+# "standard" (Ultralytics predictor) or "lean" (see lean_inference.py)
+DETECTOR_MODE = os.environ.get("YOLO_BRAWLERS_DETECTOR_MODE", "standard")
+
+# "torch", "torchscript", "onnx", "onnx-int8" or "openvino" (see backends.py)
+INFERENCE_BACKEND = os.environ.get("YOLO_BRAWLERS_BACKEND", "torch")
+
+# Clip or image directory used to calibrate static INT8 quantization;
+# without one the onnx-int8 backend uses dynamic quantization
+QUANTIZATION_CALIBRATION = os.environ.get("YOLO_BRAWLERS_CALIBRATION")
+
+# Network input size and number of dummy inferences run before the first frame
+IMGSZ = int(os.environ.get("YOLO_BRAWLERS_IMGSZ", "640"))
+WARMUP_RUNS = int(os.environ.get("YOLO_BRAWLERS_WARMUP_RUNS", "2"))
+
+# Intra-op threads the model may use (0 leaves the library default, every core)
+INFERENCE_THREADS = int(os.environ.get("YOLO_BRAWLERS_THREADS", "0"))
+
+# Lock onto the calibrated player instead of the first detected person
+TRACKING = os.environ.get("YOLO_BRAWLERS_TRACKING", "0") == "1"
+
+# Lean mode only: crop inference to the area around the player's last
+# keypoints, and shrink the input size to keep inference under a frame-time
+# budget in milliseconds (0 disables the budget)
+ROI_INFERENCE = os.environ.get("YOLO_BRAWLERS_ROI", "0") == "1"
+FRAME_BUDGET_MS = float(os.environ.get("YOLO_BRAWLERS_FRAME_BUDGET_MS", "0"))
+
+# Lean mode only: run the model on keyframes and carry the player's keypoints
+# forward in between with optical flow ("flow") or constant-velocity
+# extrapolation ("velocity"); empty disables it. The keyframe interval adapts
+# so inference averages out to the budget per frame, up to the max interval
+KEYFRAME_METHOD = os.environ.get("YOLO_BRAWLERS_KEYFRAMES", "")
+KEYFRAME_BUDGET_MS = float(os.environ.get("YOLO_BRAWLERS_KEYFRAME_BUDGET_MS", "33"))
+KEYFRAME_MAX_INTERVAL = int(os.environ.get("YOLO_BRAWLERS_KEYFRAME_MAX_INTERVAL", "6"))
+
+# Skip inference while the scene is static (the last pose is reused) and drop
+# to one probe every IDLE_PROBE_INTERVAL seconds after nobody has been seen
+# for IDLE_AFTER seconds (0 disables idle probing)
+INFERENCE_GATING = os.environ.get("YOLO_BRAWLERS_GATING", "0") == "1"
+IDLE_AFTER = float(os.environ.get("YOLO_BRAWLERS_IDLE_AFTER", "2"))
+IDLE_PROBE_INTERVAL = float(os.environ.get("YOLO_BRAWLERS_IDLE_PROBE_INTERVAL", "0.5"))
+
+# How raw per-frame poses become the pose sent to the robot: "hysteresis",
+# "majority" or "consensus" (see smoothing.py), and whether the face and
+# wrist keypoints go through a One-Euro filter before classification
+SMOOTHING = os.environ.get("YOLO_BRAWLERS_SMOOTHING", "hysteresis")
+KEYPOINT_FILTER = os.environ.get("YOLO_BRAWLERS_KEYPOINT_FILTER", "1") == "1"
+
+# Fire punches and weaves from the wrist and face trajectory before they
+# cross the zone line: keypoints are extrapolated ONSET_LEAD_MS ahead and
+# the prediction is used once its confidence (0-1) reaches ONSET_THRESHOLD
+PREDICTIVE_ONSET = os.environ.get("YOLO_BRAWLERS_PREDICT", "0") == "1"
+ONSET_LEAD_MS = float(os.environ.get("YOLO_BRAWLERS_ONSET_LEAD_MS", "60"))
+ONSET_THRESHOLD = float(os.environ.get("YOLO_BRAWLERS_ONSET_THRESHOLD", "0.6"))
+
+# Keypoints below this confidence are treated as unreliable: the pose is held
+# instead of being classified from occluded or missing face and wrist points
+KEYPOINT_MIN_CONFIDENCE = float(os.environ.get("YOLO_BRAWLERS_KEYPOINT_MIN_CONFIDENCE", "0.5"))
+
+# Append every processed frame's detections to this keypoint recording
+# (see recording.py); replay it with `python -m client.replay <path>`
+RECORD_PATH = os.environ.get("YOLO_BRAWLERS_RECORD")
+
+# Save the annotated camera feed to this directory (one file per match,
+# press 'n' in the camera window to start the next match), at this frame rate
+VIDEO_DIR = os.environ.get("YOLO_BRAWLERS_VIDEO_DIR")
+VIDEO_FPS = float(os.environ.get("YOLO_BRAWLERS_VIDEO_FPS", "30"))
+
+# Frame source for the pipeline: a camera index, video file or image
+# directory (unset uses the camera picked in the app), and the capture
+# settings requested from webcams (see frame_source.py)
+FRAME_SOURCE = os.environ.get("YOLO_BRAWLERS_SOURCE")
+CAMERA_WIDTH = int(os.environ.get("YOLO_BRAWLERS_CAMERA_WIDTH", "640"))
+CAMERA_HEIGHT = int(os.environ.get("YOLO_BRAWLERS_CAMERA_HEIGHT", "480"))
+CAMERA_FPS = int(os.environ.get("YOLO_BRAWLERS_CAMERA_FPS", "30"))
+CAMERA_MJPG = os.environ.get("YOLO_BRAWLERS_CAMERA_MJPG", "1") == "1"
+CAMERA_BUFFER_SIZE = int(os.environ.get("YOLO_BRAWLERS_CAMERA_BUFFER_SIZE", "1"))
+
+# Show the camera window (0 runs headless, e.g. on a box without a display)
+DISPLAY = os.environ.get("YOLO_BRAWLERS_DISPLAY", "1") == "1"
+
+# "threads" runs capture, inference and commands as threads of one process;
+# "processes" moves capture and inference into their own processes that share
+# frames through shared memory (see client/process_pipeline.py)
+PIPELINE = os.environ.get("YOLO_BRAWLERS_PIPELINE", "threads")
+
+# CPU cores the process pipeline divides between its inference workers, e.g.
+# "0-5" or "0,2,4,6" (empty uses every core this process may run on), and how
+# many times a crashed worker is restarted before the session is stopped
+CORE_BUDGET = os.environ.get("YOLO_BRAWLERS_CORES", "")
+MAX_WORKER_RESTARTS = int(os.environ.get("YOLO_BRAWLERS_MAX_RESTARTS", "3"))
+
+# Pipeline servo commands over an asyncio connection instead of waiting for
+# each "OK" before sending the next one (see client/async_controller.py)
+ASYNC_COMMANDS = os.environ.get("YOLO_BRAWLERS_ASYNC_COMMANDS", "0") == "1"
+
+# The ESP32 firmware understands multi-servo frames (a whole pose per
+# message); leave off for boards flashed before they were added
+MULTI_SERVO_FRAMES = os.environ.get("YOLO_BRAWLERS_MULTI_SERVO", "0") == "1"
+
+# How servo commands reach each robot: "tcp", or "udp" for latest-wins
+# datagrams carrying the full servo state (see client/udp_controller.py),
+# resent every UDP_RESEND_INTERVAL seconds. A comma-separated list sets the
+# robots separately by toy_id, e.g. "udp,tcp"
+TRANSPORTS = [transport.strip() for transport in os.environ.get("YOLO_BRAWLERS_TRANSPORT", "tcp").split(",")]
+UDP_PORT = int(os.environ.get("YOLO_BRAWLERS_UDP_PORT", "8081"))
+UDP_RESEND_INTERVAL = float(os.environ.get("YOLO_BRAWLERS_UDP_RESEND_INTERVAL", "0.1"))
+
+# Outbound servo commands: commands for the angle a servo already has are
+# always dropped. With COMMAND_TICK_MS, commands are collected and only the
+# newest angle per servo goes out, once per tick; with SERVO_MIN_INTERVAL_MS,
+# each servo moves at most that often. Both are off (0) by default: a tick
+# longer than a punch would swallow it (see client/scheduler.py)
+COMMAND_TICK_MS = float(os.environ.get("YOLO_BRAWLERS_COMMAND_TICK_MS", "0"))
+SERVO_MIN_INTERVAL_MS = float(os.environ.get("YOLO_BRAWLERS_SERVO_MIN_INTERVAL_MS", "0"))
@@ -0,0 +1,99 @@
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.append("../")
+from ml_model import config
+from ml_model.lean_inference import draw_keypoints
+from ml_model.yolo_fightingpose_detection import ZonePoseDetector
+
+PLAYER_COLORS = [(0, 0, 255), (255, 0, 0)]  # Red and Blue robots
+
+
+class DualPlayerDetector:
+    """
+    One camera and one YOLO pass for both fighters.
+
+    The frame is split down the middle: the person whose face is on the left
+    half is player 1 and the one on the right half is player 2 (swap_sides
+    reverses this). Each player gets a model-less ZonePoseDetector with its
+    own zones inside their half, so classification and smoothing stay per
+    player while the model is loaded and run once.
+    """
+
+    def __init__(self, mode=config.DETECTOR_MODE, backend=config.INFERENCE_BACKEND, swap_sides=False):
+        self.detector = ZonePoseDetector(mode=mode, backend=backend)
+        self.players = [ZonePoseDetector(mode=mode, load_model=False) for _ in range(2)]
+        self.swap_sides = swap_sides
+        self.render = True
+        self.frame_width = None
+        self.halves = None
+
+    def setup_zones(self, frame_width):
+        """Give each player their own left/middle/right zones inside their half of the frame"""
+        half = frame_width // 2
+        halves = [(0, half), (half, frame_width - half)]
+        if self.swap_sides:
+            halves.reverse()
+        for player, (x_start, width) in zip(self.players, halves):
+            player.setup_zones(width, x_start)
+        self.halves = halves
+        self.frame_width = frame_width
+
+    def assign_players(self, detections):
+        """Index of the highest scoring person on each player's side (None if nobody is there)"""
+        if len(detections.keypoints) == 0:
+            return [None, None]
+
+        face_x = detections.keypoints[:, :3, 0].mean(axis=1)
+        on_left = face_x < self.frame_width / 2
+        sides = [on_left, ~on_left]
+        if self.swap_sides:
+            sides.reverse()
+
+        # Detections are sorted by score, so the first match on a side is the best one
+        indices = []
+        for side in sides:
+            matches = np.flatnonzero(side)
+            indices.append(int(matches[0]) if len(matches) > 0 else None)
+        return indices
+
+    def process_frame(self, frame, timestamp=None):
+        """Process a frame and return it with a (player 1 pose, player 2 pose) tuple"""
+        if self.frame_width is None:
+            self.setup_zones(frame.shape[1])
+        for player in self.players:
+            player.frame_time = timestamp
+
+        detections = self.detector.detect(frame)
+        indices = self.assign_players(detections)
+
+        poses = []
+        for player, index in zip(self.players, indices):
+            pose = None
+            if index is not None:
+                pose = player.smooth_pose(player.classify_player(detections.keypoints[index],
+                                                                 detections.confidences[index]))
+            else:
+                player.lose_player()
+            poses.append(pose)
+
+        if self.render:
+            self.draw_overlay(frame, detections, indices, poses)
+        return frame, tuple(poses)
+
+    def draw_overlay(self, frame, detections, indices, poses):
+        height = frame.shape[0]
+        middle = self.frame_width // 2
+        cv2.line(frame, (middle, 0), (middle, height), (255, 255, 255), 2)
+
+        for number, (player, index, pose) in enumerate(zip(self.players, indices, poses)):
+            player.draw_zones(frame)
+            if index is not None:
+                draw_keypoints(frame, detections.keypoints[index:index + 1],
+                               detections.confidences[index:index + 1])
+            label = pose.value if pose else "-"
+            cv2.putText(frame, f"P{number + 1}: {label}", (self.halves[number][0] + 10, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, PLAYER_COLORS[number], 2)
+        return frame
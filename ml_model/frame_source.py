@@ -0,0 +1,197 @@
+import time
+from pathlib import Path
+
+import cv2
+
+from ml_model import config
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class FrameSource:
+    """
+    Where frames come from: a webcam, a video file or a directory of images.
+
+    read() returns (frame, timestamp), where timestamp is the
+    time.perf_counter() time the frame was captured, or (None, None) once
+    the source is exhausted or fails. Live sources are cameras; file
+    sources can be paced at their frame rate to stand in for one.
+    """
+
+    live = False
+
+    def open(self):
+        """Returns False if the source can't be opened"""
+        return True
+
+    def read(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def __iter__(self):
+        while True:
+            frame, timestamp = self.read()
+            if frame is None:
+                return
+            yield frame, timestamp
+
+
+class CameraSource(FrameSource):
+    """
+    Webcam configured for low latency.
+
+    MJPG lets USB cameras deliver 30+ FPS at 640x480 instead of falling back
+    to slow uncompressed modes, and a one-frame driver buffer means read()
+    returns the newest frame instead of one queued several frames ago.
+    Settings a camera doesn't support are ignored by OpenCV.
+    """
+
+    live = True
+
+    def __init__(self, index=0, width=640, height=480, fps=30, mjpg=True, buffer_size=1):
+        self.index = index
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.mjpg = mjpg
+        self.buffer_size = buffer_size
+        self.cap = None
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.index)
+        if not self.cap.isOpened():
+            print(f"Error: Could not open camera {self.index}.")
+            return False
+
+        # The codec has to be chosen before the resolution on some backends
+        if self.mjpg:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+        if self.width and self.height:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.fps:
+            self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        if self.buffer_size:
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+
+        print(f"Camera {self.index}: {int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x"
+              f"{int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))} @ {self.cap.get(cv2.CAP_PROP_FPS):.0f} FPS")
+        return True
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            return None, None
+        return frame, time.perf_counter()
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+
+class PacedSource(FrameSource):
+    """File source that can hold each frame back until it would have arrived from a camera"""
+
+    def __init__(self, fps=30.0, paced=True):
+        self.fps = fps
+        self.paced = paced
+        self.next_time = None
+
+    def wait(self):
+        if not self.paced or not self.fps:
+            return
+        now = time.perf_counter()
+        if self.next_time is None or now - self.next_time > 1.0:
+            self.next_time = now  # First frame, or we fell far behind: don't try to catch up
+        elif self.next_time > now:
+            time.sleep(self.next_time - now)
+        self.next_time += 1.0 / self.fps
+
+
+class VideoFileSource(PacedSource):
+    def __init__(self, path, paced=True, loop=False):
+        super().__init__(paced=paced)
+        self.path = str(path)
+        self.loop = loop
+        self.cap = None
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            print(f"Error: Could not open video {self.path}.")
+            return False
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        return True
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        if not ret:
+            return None, None
+        self.wait()
+        return frame, time.perf_counter()
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+
+class ImageDirSource(PacedSource):
+    def __init__(self, path, fps=30.0, paced=True, loop=False):
+        super().__init__(fps, paced)
+        self.path = Path(path)
+        self.loop = loop
+        self.paths = []
+        self.position = 0
+
+    def open(self):
+        self.paths = sorted(p for p in self.path.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        if not self.paths:
+            print(f"Error: No images in {self.path}.")
+            return False
+        return True
+
+    def read(self):
+        if self.position >= len(self.paths):
+            if not self.loop:
+                return None, None
+            self.position = 0
+        frame = cv2.imread(str(self.paths[self.position]))
+        self.position += 1
+        if frame is None:
+            return None, None
+        self.wait()
+        return frame, time.perf_counter()
+
+
+def open_source(source, paced=True, **camera_settings):
+    """
+    FrameSource for a camera index, video file or image directory.
+
+    An existing FrameSource is returned as is. camera_settings are passed to
+    CameraSource (width, height, fps, mjpg, buffer_size).
+    """
+    if isinstance(source, FrameSource):
+        return source
+    if isinstance(source, int) or str(source).isdigit():
+        return CameraSource(int(source), **camera_settings)
+    if Path(source).is_dir():
+        return ImageDirSource(source, paced=paced)
+    return VideoFileSource(source, paced=paced)
+
+
+def camera_settings():
+    """Webcam settings from config, as keyword arguments for CameraSource"""
+    return {"width": config.CAMERA_WIDTH, "height": config.CAMERA_HEIGHT, "fps": config.CAMERA_FPS,
+            "mjpg": config.CAMERA_MJPG, "buffer_size": config.CAMERA_BUFFER_SIZE}
+
+
+def configured_source(default=0):
+    """Frame source from YOLO_BRAWLERS_SOURCE (or default) with the configured camera settings"""
+    return open_source(config.FRAME_SOURCE or default, **camera_settings())
@@ -0,0 +1,93 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class InferenceGate:
+    """
+    Decides per frame whether the model needs to run at all.
+
+    Motion gating: each frame is shrunk to a tiny grayscale thumbnail and
+    compared with the thumbnail of the last frame that went through
+    inference. If fewer than `motion_fraction` of its pixels changed by more
+    than `pixel_threshold` grey levels, the scene is static and the last
+    pose still holds. Comparing against the last inferred frame (not the
+    previous one) means slow drift still adds up to a fresh inference, and
+    `max_static_frames` bounds how long a pose can be reused regardless.
+
+    Idle mode: once nobody has been detected for `idle_after` seconds,
+    inference drops to one probe every `idle_probe_interval` seconds. The
+    first probe that finds a person ends idle mode straight away.
+    """
+
+    def __init__(self, pixel_threshold=20, motion_fraction=0.01, max_static_frames=15,
+                 idle_after=2.0, idle_probe_interval=0.5, thumbnail_size=(80, 60)):
+        self.pixel_threshold = pixel_threshold
+        self.motion_fraction = motion_fraction
+        self.max_static_frames = max_static_frames
+        self.idle_after = idle_after
+        self.idle_probe_interval = idle_probe_interval
+        self.thumbnail_size = thumbnail_size
+
+        self.reference = None  # Thumbnail of the last inferred frame
+        self.static_frames = 0
+        self.last_seen = None  # Starts counting from the first frame
+        self.last_probe = 0.0
+
+        # How much inference is being saved
+        self.inferences = 0
+        self.skipped_static = 0
+        self.skipped_idle = 0
+
+    @property
+    def idle(self):
+        return (self.idle_probe_interval > 0 and self.last_seen is not None
+                and time.monotonic() - self.last_seen >= self.idle_after)
+
+    @property
+    def skipped(self):
+        return self.skipped_static + self.skipped_idle
+
+    def thumbnail(self, frame):
+        small = cv2.resize(frame, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def should_infer(self, frame):
+        """True if this frame has to go through the model"""
+        now = time.monotonic()
+        if self.last_seen is None:
+            self.last_seen = now
+        if self.idle:
+            if now - self.last_probe < self.idle_probe_interval:
+                self.skipped_idle += 1
+                return False
+            self.last_probe = now
+            self.reference = self.thumbnail(frame)
+            self.inferences += 1
+            return True
+
+        thumbnail = self.thumbnail(frame)
+        if self.reference is not None and self.static_frames < self.max_static_frames:
+            changed = np.count_nonzero(cv2.absdiff(thumbnail, self.reference) > self.pixel_threshold)
+            if changed < self.motion_fraction * thumbnail.size:
+                self.static_frames += 1
+                self.skipped_static += 1
+                return False
+
+        self.reference = thumbnail
+        self.static_frames = 0
+        self.inferences += 1
+        return True
+
+    def record(self, person_found):
+        """Report whether the inference that was just run found a person"""
+        if person_found:
+            self.last_seen = time.monotonic()
+
+    def stats(self):
+        return {
+            "inferences": self.inferences,
+            "skipped_static": self.skipped_static,
+            "skipped_idle": self.skipped_idle,
+        }
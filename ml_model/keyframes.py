@@ -0,0 +1,106 @@
+import math
+import time
+
+import cv2
+import numpy as np
+
+from ml_model.lean_inference import CLASSIFIED_KEYPOINTS
+
+
+class KeyframeScheduler:
+    """
+    Runs full inference only on keyframes and estimates keypoints in between.
+
+    Between keyframes the player's face and wrist keypoints are carried
+    forward, either with sparse Lucas-Kanade optical flow ("flow") or by
+    constant-velocity extrapolation from the last two keyframes
+    ("velocity"). A keyframe is forced when flow loses a point or a point
+    jumps more than motion_threshold pixels. The keyframe interval adapts
+    to the measured inference time: enough frames are estimated to
+    amortize one inference over frame_budget_ms per frame, capped at
+    max_interval so estimates never drift far.
+    """
+
+    METHODS = ("flow", "velocity")
+
+    def __init__(self, method="flow", frame_budget_ms=33.0, max_interval=6, motion_threshold=40.0):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown keyframe method: {method}")
+        self.method = method
+        self.frame_budget_ms = frame_budget_ms
+        self.max_interval = max_interval
+        self.motion_threshold = motion_threshold
+
+        self.interval = 1
+        self.inference_ms = None  # Moving average of keyframe inference time
+        self.since_keyframe = 0
+
+        self.keypoints = None
+        self.confidences = None
+        self.velocity = None
+        self.last_time = None
+        self.prev_gray = None
+        self.last_keyframe = None  # (keypoints, time) measured at the previous keyframe
+
+        # Counters to see how much inference is being skipped
+        self.keyframe_count = 0
+        self.estimated_count = 0
+
+    def estimate(self, frame):
+        """
+        Estimated (keypoints, confidences) of the player for this frame, or
+        None when this frame should be a keyframe and go through inference.
+        """
+        now = time.perf_counter()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if self.method == "flow" else None
+
+        if self.keypoints is None or self.since_keyframe + 1 >= self.interval:
+            self.prev_gray = gray
+            return None
+
+        if self.method == "flow":
+            points = self.keypoints[CLASSIFIED_KEYPOINTS].reshape(-1, 1, 2).astype(np.float32)
+            moved, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, points, None,
+                                                        winSize=(21, 21), maxLevel=2)
+            if moved is None or not status.all():
+                self.prev_gray = gray
+                return None
+            moved = moved.reshape(-1, 2)
+            if np.abs(moved - points.reshape(-1, 2)).max() > self.motion_threshold:
+                self.prev_gray = gray
+                return None  # Fast motion: get real keypoints now
+            self.keypoints[CLASSIFIED_KEYPOINTS] = moved
+            self.prev_gray = gray
+        else:
+            self.keypoints = self.keypoints + self.velocity * (now - self.last_time)
+
+        self.last_time = now
+        self.since_keyframe += 1
+        self.estimated_count += 1
+        return self.keypoints.copy(), self.confidences
+
+    def keyframe(self, player, inference_ms):
+        """Record the keyframe result (player is (keypoints, confidences) or None)"""
+        now = time.perf_counter()
+        if self.inference_ms is None:
+            self.inference_ms = inference_ms
+        else:
+            self.inference_ms = 0.8 * self.inference_ms + 0.2 * inference_ms
+        self.interval = max(1, min(self.max_interval, math.ceil(self.inference_ms / self.frame_budget_ms)))
+
+        if player is None:
+            self.keypoints = None  # Nothing to propagate until the player is found again
+            self.last_keyframe = None
+        else:
+            keypoints, confidences = player
+            if self.last_keyframe is not None and now > self.last_keyframe[1]:
+                self.velocity = (keypoints - self.last_keyframe[0]) / (now - self.last_keyframe[1])
+            else:
+                self.velocity = np.zeros_like(keypoints)
+            self.keypoints = keypoints.astype(np.float32).copy()
+            self.confidences = confidences
+            self.last_keyframe = (self.keypoints.copy(), now)
+
+        self.last_time = now
+        self.since_keyframe = 0
+        self.keyframe_count += 1
@@ -0,0 +1,197 @@
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+NUM_KEYPOINTS = 17
+
+# Nose, eyes and wrists: every keypoint classify_pose reads
+CLASSIFIED_KEYPOINTS = [0, 1, 2, 9, 10]
+
+# Skeleton edges (COCO keypoint indices) drawn by the lean overlay
+SKELETON = [
+    (5, 7), (7, 9), (6, 8), (8, 10), (5, 6), (5, 11), (6, 12),
+    (11, 12), (0, 1), (0, 2), (1, 3), (2, 4),
+]
+
+# All detections in one frame, in full-frame pixel coordinates
+# boxes: (n, 4) xyxy, scores: (n,), keypoints: (n, 17, 2), confidences: (n, 17)
+PoseDetections = namedtuple("PoseDetections", ["boxes", "scores", "keypoints", "confidences"])
+
+
+def empty_detections():
+    return PoseDetections(
+        np.zeros((0, 4), np.float32),
+        np.zeros((0,), np.float32),
+        np.zeros((0, NUM_KEYPOINTS, 2), np.float32),
+        np.zeros((0, NUM_KEYPOINTS), np.float32),
+    )
+
+
+class Letterbox:
+    """
+    Letterboxes BGR frames into a reusable RGB float32 (1, 3, H, W) blob.
+
+    Buffers are allocated once per frame size. With rect=True the input is
+    the minimal stride-aligned rectangle (as the Ultralytics predictor
+    does), otherwise the full imgsz square that exported graphs expect.
+    With scaleup=False small inputs (e.g. player crops) are never enlarged.
+    """
+
+    def __init__(self, imgsz=640, stride=32, rect=True, scaleup=True):
+        self.imgsz = imgsz
+        self.stride = stride
+        self.rect = rect
+        self.scaleup = scaleup
+
+        self.frame_shape = None
+        self.canvas = None
+        self.blob = None
+        self.resized = None
+        self.gain = 1.0
+        self.pad = (0, 0)
+
+    def setup(self, frame_shape):
+        """Size the reusable buffers for frames of this shape"""
+        height, width = frame_shape[:2]
+        self.gain = min(self.imgsz / height, self.imgsz / width)
+        if not self.scaleup:
+            self.gain = min(self.gain, 1.0)
+        new_w, new_h = int(round(width * self.gain)), int(round(height * self.gain))
+        if self.rect:
+            input_w = -(-new_w // self.stride) * self.stride
+            input_h = -(-new_h // self.stride) * self.stride
+        else:
+            input_w = input_h = self.imgsz
+        self.pad = ((input_w - new_w) // 2, (input_h - new_h) // 2)
+
+        self.resized = np.empty((new_h, new_w, 3), dtype=np.uint8)
+        self.canvas = np.full((input_h, input_w, 3), 114, dtype=np.uint8)
+        self.blob = np.empty((1, 3, input_h, input_w), dtype=np.float32)
+        self.frame_shape = frame_shape
+
+    def __call__(self, frame):
+        if frame.shape != self.frame_shape:
+            self.setup(frame.shape)
+
+        new_h, new_w = self.resized.shape[:2]
+        pad_x, pad_y = self.pad
+        cv2.resize(frame, (new_w, new_h), dst=self.resized, interpolation=cv2.INTER_LINEAR)
+        self.canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = self.resized
+
+        # HWC BGR uint8 -> CHW RGB float32 in [0, 1]
+        np.multiply(self.canvas.transpose(2, 0, 1)[::-1], 1.0 / 255.0,
+                    out=self.blob[0], casting="unsafe")
+        return self.blob
+
+    def to_frame(self, points):
+        """Map (..., 2) network-input coordinates back to the original frame"""
+        return (points - np.array(self.pad, dtype=np.float32)) / self.gain
+
+
+class LeanPosePredictor:
+    """
+    Minimal YOLO pose inference path.
+
+    Skips the Ultralytics predictor and Results objects: frames are
+    letterboxed and normalized into reusable buffers, the backend (see
+    backends.py) runs the network, and the raw prediction for every person
+    comes back to the host in a single transfer before NMS and decoding run
+    in NumPy.
+    """
+
+    def __init__(self, backend, imgsz=640, conf=0.25, iou=0.7):
+        self.backend = backend
+        self.conf = conf
+        self.iou = iou
+
+        # Fixed-shape exported graphs need the full square input
+        self.letterbox = Letterbox(imgsz, rect=not backend.fixed_shape)
+
+        # One letterbox per batch slot (cameras may differ in resolution)
+        self.batch_letterboxes = []
+        self.batch_blob = None
+
+    def set_imgsz(self, imgsz):
+        """Change the network input size (only for backends without a fixed shape)"""
+        if imgsz == self.letterbox.imgsz:
+            return
+        for letterbox in [self.letterbox] + self.batch_letterboxes:
+            letterbox.imgsz = imgsz
+            letterbox.frame_shape = None  # Reallocate buffers on the next frame
+
+    def preprocess(self, frame):
+        """Letterbox the BGR frame into the network input buffer"""
+        return self.letterbox(frame)
+
+    def forward(self):
+        """Run the network and return the raw (4 + classes + 17 * 3, anchors) prediction"""
+        return self.backend.infer(self.letterbox.blob)[0]
+
+    def postprocess(self, preds, letterbox=None):
+        """Filter, NMS and map predictions back to full-frame coordinates"""
+        letterbox = letterbox or self.letterbox
+        kpt_start = len(preds) - NUM_KEYPOINTS * 3
+        class_scores = preds[4] if kpt_start == 5 else preds[4:kpt_start].max(axis=0)
+        candidates = np.flatnonzero(class_scores > self.conf)
+        if len(candidates) == 0:
+            return empty_detections()
+
+        preds = preds[:, candidates]
+        scores = class_scores[candidates]
+        xywh = preds[:4].T
+        top_left = xywh[:, :2] - xywh[:, 2:] / 2
+
+        keep = cv2.dnn.NMSBoxes(np.hstack([top_left, xywh[:, 2:]]).tolist(),
+                                scores.tolist(), self.conf, self.iou)
+        keep = np.asarray(keep, dtype=np.int64).reshape(-1)
+        if len(keep) == 0:
+            return empty_detections()
+
+        corners = np.stack([top_left[keep], top_left[keep] + xywh[keep, 2:]], axis=1)
+        boxes = letterbox.to_frame(corners).reshape(-1, 4)
+        kpts = preds[kpt_start:, keep].T.reshape(-1, NUM_KEYPOINTS, 3)
+        keypoints = letterbox.to_frame(kpts[..., :2])
+
+        height, width = letterbox.frame_shape[:2]
+        np.clip(boxes[:, 0::2], 0, width, out=boxes[:, 0::2])
+        np.clip(boxes[:, 1::2], 0, height, out=boxes[:, 1::2])
+        return PoseDetections(boxes.astype(np.float32), scores[keep].astype(np.float32),
+                              keypoints.astype(np.float32), kpts[..., 2].astype(np.float32))
+
+    def __call__(self, frame):
+        self.preprocess(frame)
+        return self.postprocess(self.forward())
+
+    def predict_batch(self, frames):
+        """Detect people in several frames (e.g. one per camera) with a single network call"""
+        while len(self.batch_letterboxes) < len(frames):
+            self.batch_letterboxes.append(Letterbox(self.letterbox.imgsz, rect=self.letterbox.rect))
+        letterboxes = self.batch_letterboxes[:len(frames)]
+        blobs = [letterbox(frame) for letterbox, frame in zip(letterboxes, frames)]
+
+        if not self.backend.supports_batch or len({blob.shape for blob in blobs}) > 1:
+            # Fixed batch-1 graphs and mixed input sizes run one frame at a time
+            preds = [self.backend.infer(blob)[0] for blob in blobs]
+        else:
+            batch_shape = (len(blobs),) + blobs[0].shape[1:]
+            if self.batch_blob is None or self.batch_blob.shape != batch_shape:
+                self.batch_blob = np.empty(batch_shape, dtype=np.float32)
+            for slot, blob in enumerate(blobs):
+                self.batch_blob[slot] = blob[0]
+            preds = self.backend.infer(self.batch_blob)
+
+        return [self.postprocess(pred, letterbox) for pred, letterbox in zip(preds, letterboxes)]
+
+
+def draw_keypoints(frame, keypoints, confidences, min_confidence=0.5):
+    """Draw a light-weight skeleton for every detected person"""
+    for person, person_conf in zip(keypoints, confidences):
+        points = person.astype(np.int32)
+        for a, b in SKELETON:
+            if person_conf[a] >= min_confidence and person_conf[b] >= min_confidence:
+                cv2.line(frame, tuple(points[a]), tuple(points[b]), (255, 128, 0), 2)
+        for point, conf in zip(points, person_conf):
+            if conf >= min_confidence:
+                cv2.circle(frame, tuple(point), 4, (0, 0, 255), -1)
+    return frame
@@ -0,0 +1,61 @@
+import time
+
+import numpy as np
+
+from ml_model.lean_inference import CLASSIFIED_KEYPOINTS
+
+
+class OnsetPredictor:
+    """
+    Predicts where the face and wrists are about to be.
+
+    Velocity and acceleration of the classified keypoints are estimated from
+    the last three observations, and the keypoints are extrapolated
+    `lead_time` seconds ahead. Classifying the extrapolated keypoints fires a
+    punch or weave while the wrist or head is still travelling towards the
+    zone line instead of after it crossed it.
+
+    The confidence of a prediction grows with the horizontal speed of the
+    fastest point between `min_speed` and `commit_speed` (pixels per second)
+    and is halved while that point is decelerating, since a slowing hand is
+    more likely a feint or a retracting punch.
+    """
+
+    def __init__(self, lead_time=0.06, min_speed=300.0, commit_speed=1200.0, threshold=0.6):
+        self.lead_time = lead_time
+        self.min_speed = min_speed
+        self.commit_speed = commit_speed
+        self.threshold = threshold
+        self.predicted_count = 0
+        self.reset()
+
+    def reset(self):
+        self.history = []  # Up to three (time, points) observations
+
+    def update(self, keypoints, timestamp=None):
+        """Record the player's keypoints; returns (extrapolated keypoints, confidence)"""
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        points = np.asarray(keypoints, dtype=np.float32)[CLASSIFIED_KEYPOINTS]
+        if self.history and timestamp <= self.history[-1][0]:
+            return keypoints, 0.0
+        self.history = self.history[-2:] + [(timestamp, points)]
+        if len(self.history) < 2:
+            return keypoints, 0.0
+
+        (t1, p1), (t2, p2) = self.history[-2:]
+        velocity = (p2 - p1) / (t2 - t1)
+        acceleration = np.zeros_like(velocity)
+        if len(self.history) == 3:
+            t0, p0 = self.history[0]
+            acceleration = (velocity - (p1 - p0) / (t1 - t0)) / ((t2 - t0) / 2)
+
+        lead = self.lead_time
+        predicted = np.array(keypoints, dtype=np.float32)
+        predicted[CLASSIFIED_KEYPOINTS] = points + velocity * lead + 0.5 * acceleration * lead ** 2
+
+        fastest = int(np.argmax(np.abs(velocity[:, 0])))
+        speed = abs(velocity[fastest, 0])
+        confidence = float(np.clip((speed - self.min_speed) / (self.commit_speed - self.min_speed), 0.0, 1.0))
+        if velocity[fastest, 0] * acceleration[fastest, 0] < 0:
+            confidence *= 0.5
+        return predicted, confidence
@@ -0,0 +1,46 @@
+import threading
+
+
+class DetectorPreloader:
+    """
+    Loads and warms up a ZonePoseDetector on a background thread.
+
+    Start it while the user is still clicking through menus; by the time the
+    camera opens, take() hands over a model that is already loaded and past
+    its slow first inferences, instead of importing torch and Ultralytics,
+    loading the weights and warming up right then.
+    """
+
+    def __init__(self, **detector_kwargs):
+        self.detector_kwargs = detector_kwargs
+        self.detector = None
+        self.error = None
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.load, name="preload", daemon=True)
+        self.thread.start()
+        return self
+
+    def load(self):
+        try:
+            from ml_model.yolo_fightingpose_detection import ZonePoseDetector
+            self.detector = ZonePoseDetector(**self.detector_kwargs)
+        except Exception as e:
+            self.error = e
+
+    @property
+    def ready(self):
+        return self.thread is not None and not self.thread.is_alive()
+
+    def take(self, timeout=None):
+        """Wait for the detector and hand it over; None if loading failed or timed out"""
+        if self.thread is None:
+            self.start()
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            return None
+        if self.error:
+            print(f"Failed to preload the pose model: {self.error}")
+        detector, self.detector = self.detector, None
+        return detector
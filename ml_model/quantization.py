@@ -0,0 +1,90 @@
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append("../")
+from ml_model import config
+from ml_model.lean_inference import Letterbox
+
+
+def quantized_path(onnx_path, static):
+    """Where the INT8 variant of an ONNX export is stored"""
+    onnx_path = Path(onnx_path)
+    suffix = "_int8_static" if static else "_int8"
+    return onnx_path.with_name(f"{onnx_path.stem}{suffix}.onnx")
+
+
+def quantize_model(onnx_path, calibration=None, imgsz=640, max_frames=100, overwrite=False):
+    """
+    Quantize an ONNX export of the pose model to INT8 and return its path.
+
+    Without calibration the weights are quantized dynamically. With a clip or
+    image directory, activations are calibrated on its frames (static QDQ
+    quantization), which is usually faster on CPU for a conv network.
+    """
+    try:
+        from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                              quantize_dynamic, quantize_static)
+    except ImportError:
+        raise ImportError("INT8 quantization needs onnxruntime: pip install onnxruntime")
+
+    output_path = quantized_path(onnx_path, static=calibration is not None)
+    if output_path.exists() and not overwrite:
+        return output_path
+
+    if calibration is None:
+        print(f"Quantizing {onnx_path} (dynamic INT8)...")
+        quantize_dynamic(str(onnx_path), str(output_path), weight_type=QuantType.QUInt8)
+        return output_path
+
+    from ml_model.benchmark import load_frames
+
+    frames = load_frames(calibration, max_frames)
+    if not frames:
+        raise ValueError(f"No calibration frames could be read from {calibration}")
+
+    class FrameCalibrationReader(CalibrationDataReader):
+        """Feeds calibration frames through the same letterbox the detector uses"""
+
+        def __init__(self, input_name):
+            self.input_name = input_name
+            self.letterbox = Letterbox(imgsz, rect=False)
+            self.frames = iter(frames)
+
+        def get_next(self):
+            frame = next(self.frames, None)
+            if frame is None:
+                return None
+            return {self.input_name: self.letterbox(frame).copy()}
+
+    import onnxruntime as ort
+
+    input_name = ort.InferenceSession(str(onnx_path), providers=["CPUExecutionProvider"]) \
+        .get_inputs()[0].name
+
+    print(f"Quantizing {onnx_path} (static INT8, {len(frames)} calibration frames)...")
+    quantize_static(str(onnx_path), str(output_path), FrameCalibrationReader(input_name),
+                    quant_format=QuantFormat.QDQ, per_channel=True,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Produce an INT8 variant of the pose model")
+    parser.add_argument("--calibration", default=config.QUANTIZATION_CALIBRATION,
+                        help="Clip or image directory for static quantization (dynamic if omitted)")
+    parser.add_argument("--frames", type=int, default=100, help="Calibration frames to use")
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+
+    from ml_model.backends import export_model
+
+    onnx_path = export_model(config.MODEL_PATH, "onnx", config.IMGSZ)
+    output_path = quantize_model(onnx_path, calibration=args.calibration, imgsz=config.IMGSZ,
+                                 max_frames=args.frames, overwrite=args.overwrite)
+    print(f"Quantized model: {output_path}")
+    print("Check it with verify_quantization.py before selecting the onnx-int8 backend.")
+
+
+if __name__ == "__main__":
+    main()
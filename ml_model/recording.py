@@ -0,0 +1,143 @@
+import os
+import struct
+
+import numpy as np
+
+from ml_model.lean_inference import NUM_KEYPOINTS, PoseDetections, empty_detections
+
+# File layout: a 16-byte header (magic, version, frame width and height)
+# followed by fixed-size little-endian rows, one per detected person. A frame
+# without anyone in it is stored as a single row with person -1, so every
+# frame keeps its timestamp. Rows are only ever appended, and the whole file
+# can be memory-mapped as one structured array.
+MAGIC = b"YBKP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHH6x")
+
+RECORD_DTYPE = np.dtype([
+    ("frame", "<u4"),
+    ("person", "<i2"),
+    ("timestamp", "<f8"),
+    ("box", "<f4", 4),
+    ("score", "<f4"),
+    ("keypoints", "<f4", (NUM_KEYPOINTS, 2)),
+    ("confidences", "<f2", NUM_KEYPOINTS),
+])
+
+
+def read_header(path):
+    """(width, height) stored in a recording's header"""
+    with open(path, "rb") as f:
+        magic, version, width, height = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a keypoint recording")
+    if version != VERSION:
+        raise ValueError(f"Unsupported keypoint recording version {version} in {path}")
+    return width, height
+
+
+class KeypointRecorder:
+    """
+    Appends every processed frame's detections to a keypoint recording.
+
+    Writing an existing recording continues it (frame numbers carry on), so
+    several sessions can be collected in one file. Rows are buffered and
+    flushed every `flush_every` frames.
+    """
+
+    def __init__(self, path, flush_every=30):
+        self.path = path
+        self.flush_every = flush_every
+        self.file = None
+        self.frame = 0
+
+    def open(self, frame_shape):
+        height, width = frame_shape[:2]
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= HEADER.size:
+            if read_header(self.path) != (width, height):
+                print(f"Warning: {self.path} was recorded at a different frame size")
+            recording = KeypointRecording(self.path)
+            if len(recording.rows):
+                self.frame = int(recording.rows["frame"][-1]) + 1
+            del recording
+            self.file = open(self.path, "ab")
+        else:
+            self.file = open(self.path, "wb")
+            self.file.write(HEADER.pack(MAGIC, VERSION, width, height))
+
+    def record(self, frame_shape, timestamp, detections):
+        """Append one frame's detections (all people, not only the player)"""
+        if self.file is None:
+            self.open(frame_shape)
+
+        count = len(detections.boxes)
+        rows = np.zeros(max(count, 1), dtype=RECORD_DTYPE)
+        rows["frame"] = self.frame
+        rows["timestamp"] = timestamp
+        if count:
+            rows["person"] = np.arange(count)
+            rows["box"] = detections.boxes
+            rows["score"] = detections.scores
+            rows["keypoints"] = detections.keypoints
+            rows["confidences"] = detections.confidences
+        else:
+            rows["person"] = -1
+        self.file.write(rows.tobytes())
+
+        self.frame += 1
+        if self.frame % self.flush_every == 0:
+            self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+class KeypointRecording:
+    """Read-only memory-mapped view of a keypoint recording"""
+
+    def __init__(self, path):
+        self.path = path
+        self.width, self.height = read_header(path)
+        # A crash mid-write can leave a partial last row; it is ignored
+        count = (os.path.getsize(path) - HEADER.size) // RECORD_DTYPE.itemsize
+        if count:
+            rows = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER.size, shape=(count,))
+            self.rows = rows.view(np.ndarray)  # Same mapping, without memmap's per-slice overhead
+        else:
+            self.rows = np.zeros(0, dtype=RECORD_DTYPE)
+
+        # Row index where each frame starts
+        frames = self.rows["frame"]
+        self.starts = np.flatnonzero(frames[1:] != frames[:-1]) + 1
+        if count:
+            self.starts = np.concatenate([[0], self.starts])
+
+    @property
+    def frame_shape(self):
+        return self.height, self.width, 3
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def duration(self):
+        if len(self.rows) == 0:
+            return 0.0
+        return float(self.rows["timestamp"][-1] - self.rows["timestamp"][0])
+
+    def frames(self):
+        """Yield (timestamp, PoseDetections) for every recorded frame"""
+        ends = np.append(self.starts[1:], len(self.rows))
+        for start, end in zip(self.starts, ends):
+            rows = self.rows[start:end]
+            if rows["person"][0] < 0:
+                yield float(rows["timestamp"][0]), empty_detections()
+                continue
+            yield float(rows["timestamp"][0]), PoseDetections(
+                np.array(rows["box"]),
+                np.array(rows["score"]),
+                np.array(rows["keypoints"]),
+                rows["confidences"].astype(np.float32),
+            )
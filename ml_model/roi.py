@@ -0,0 +1,125 @@
+from collections import deque
+
+import numpy as np
+
+from ml_model.lean_inference import PoseDetections
+
+
+def offset_detections(detections, x_offset, y_offset):
+    """Shift detections made on a crop back into full-frame coordinates"""
+    offset = np.array([x_offset, y_offset], dtype=np.float32)
+    return PoseDetections(
+        detections.boxes + np.tile(offset, 2),
+        detections.scores,
+        detections.keypoints + offset,
+        detections.confidences,
+    )
+
+
+class RoiCropper:
+    """
+    Crop region around the player for the next inference.
+
+    After the player is found, the next frame is cropped to their keypoint
+    bounding box expanded by `expand` on every side (punches and weaves
+    need room). Region sizes are rounded up to `step` pixels so the
+    letterbox buffers are only reallocated when the player's size really
+    changes, and never below `min_fraction` of the frame (or one step), so
+    a flat or face-only box still leaves room to find the whole player.
+    After `max_misses` frames without the player, inference falls back to
+    the full frame.
+    """
+
+    def __init__(self, expand=0.6, min_confidence=0.3, step=64, max_misses=2, min_fraction=0.25):
+        self.expand = expand
+        self.min_confidence = min_confidence
+        self.step = step
+        self.min_fraction = min_fraction
+        self.max_misses = max_misses
+
+        self.box = None
+        self.misses = 0
+
+    def reset(self):
+        self.box = None
+        self.misses = 0
+
+    def update(self, keypoints, confidences):
+        """Remember where the player's visible keypoints are"""
+        visible = keypoints[confidences >= self.min_confidence]
+        if len(visible) < 3:
+            self.miss()
+            return
+        self.box = np.concatenate([visible.min(axis=0), visible.max(axis=0)])
+        self.misses = 0
+
+    def miss(self):
+        self.misses += 1
+        if self.misses > self.max_misses:
+            self.reset()
+
+    def region(self, frame_shape):
+        """(x0, y0, x1, y1) to crop the next frame to, or None for the full frame"""
+        if self.box is None:
+            return None
+
+        height, width = frame_shape[:2]
+        x1, y1, x2, y2 = self.box
+        margin_x = (x2 - x1) * self.expand
+        margin_y = (y2 - y1) * self.expand
+
+        # Round the region size up to the step so its shape rarely changes
+        region_w = self.side(x2 - x1 + 2 * margin_x, width)
+        region_h = self.side(y2 - y1 + 2 * margin_y, height)
+        center_x, center_y = (x1 + x2) / 2, (y1 + y2) / 2
+        left = int(np.clip(center_x - region_w / 2, 0, width - region_w))
+        top = int(np.clip(center_y - region_h / 2, 0, height - region_h))
+
+        if region_w * region_h >= 0.8 * width * height:
+            return None  # Cropping would barely save anything
+        return left, top, left + region_w, top + region_h
+
+    def side(self, size, frame_size):
+        """Region side for a box side of size pixels: at least the minimum, rounded up to the step"""
+        size = max(size, self.min_fraction * frame_size, 1)
+        return min(frame_size, int(-(-size // self.step) * self.step))
+
+
+class ResolutionGovernor:
+    """
+    Picks the network input size that keeps inference inside a frame-time budget.
+
+    Inference times are averaged over a short window. If the average exceeds
+    the budget the size steps down. If the next size up is predicted to fit
+    (time scales with pixel count) with some headroom, it steps back up.
+    """
+
+    SIZES = (320, 384, 448, 512, 576, 640)
+
+    def __init__(self, budget_ms, sizes=SIZES, window=15, headroom=0.85):
+        self.budget_ms = budget_ms
+        self.sizes = sizes
+        self.window = deque(maxlen=window)
+        self.headroom = headroom
+        self.index = len(sizes) - 1
+
+    @property
+    def imgsz(self):
+        return self.sizes[self.index]
+
+    def record(self, frame_ms):
+        """Add one measured inference time; returns the input size to use next"""
+        self.window.append(frame_ms)
+        if len(self.window) < self.window.maxlen:
+            return self.imgsz
+
+        average = sum(self.window) / len(self.window)
+        if average > self.budget_ms and self.index > 0:
+            self.index -= 1
+            self.window.clear()
+        elif self.index < len(self.sizes) - 1:
+            scale = (self.sizes[self.index + 1] / self.imgsz) ** 2
+            if average * scale < self.budget_ms * self.headroom:
+                self.index += 1
+                self.window.clear()
+        return self.imgsz
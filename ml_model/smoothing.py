@@ -0,0 +1,137 @@
+import math
+import time
+
+import numpy as np
+
+from ml_model.lean_inference import CLASSIFIED_KEYPOINTS
+
+
+class OneEuroFilter:
+    """
+    One-Euro low-pass filter over an array of coordinates.
+
+    The cutoff frequency rises with the speed of the signal: a resting
+    guard gets heavy smoothing (min_cutoff) so the wrists stop jittering
+    across zone lines, while a fast punch raises the cutoff by beta * speed
+    and passes through with almost no lag.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.01, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.derivative = None
+        self.last_time = None
+
+    @staticmethod
+    def alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, value, timestamp=None):
+        """Filter the next sample (timestamp in seconds, defaults to now)"""
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        value = np.asarray(value, dtype=np.float32)
+        if self.value is None or timestamp <= self.last_time:
+            self.value = value.copy()
+            self.derivative = np.zeros_like(value)
+            self.last_time = timestamp
+            return self.value.copy()
+
+        dt = timestamp - self.last_time
+        derivative = (value - self.value) / dt
+        self.derivative += self.alpha(self.d_cutoff, dt) * (derivative - self.derivative)
+
+        # Per-coordinate cutoff from the filtered speed
+        cutoff = self.min_cutoff + self.beta * np.abs(self.derivative)
+        self.value += self.alpha(cutoff, dt) * (value - self.value)
+        self.last_time = timestamp
+        return self.value.copy()
+
+
+class PoseSmoother:
+    """
+    Turns the per-frame pose classification into a stable pose.
+
+    The last `window` raw poses sit in a fixed-size ring buffer with a
+    running count per pose, so every update is O(1). Strategies:
+
+    - "hysteresis": switch as soon as a new pose has been seen on
+      `confirm_frames` consecutive frames (one frame of lag by default);
+      single-frame flickers never get through.
+    - "majority": switch to a pose once it fills more than half the window.
+    - "consensus": switch only when the whole window agrees (the old
+      3-frame vote, but holding the current pose while undecided).
+    """
+
+    STRATEGIES = ("hysteresis", "majority", "consensus")
+
+    def __init__(self, strategy="hysteresis", window=3, confirm_frames=2):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown smoothing strategy: {strategy}")
+        self.strategy = strategy
+        self.window = window
+        self.confirm_frames = confirm_frames
+        self.reset()
+
+    def reset(self):
+        self.ring = [None] * self.window
+        self.index = 0
+        self.filled = 0
+        self.counts = {}
+        self.stable = None
+        self.candidate = None
+        self.streak = 0
+
+    def update(self, pose):
+        """Add the latest raw pose; returns the smoothed pose"""
+        oldest = self.ring[self.index]
+        if self.filled == self.window:
+            self.counts[oldest] -= 1
+        else:
+            self.filled += 1
+        self.ring[self.index] = pose
+        self.index = (self.index + 1) % self.window
+        self.counts[pose] = self.counts.get(pose, 0) + 1
+
+        if pose == self.candidate:
+            self.streak += 1
+        else:
+            self.candidate, self.streak = pose, 1
+
+        if self.stable is None:
+            self.stable = pose  # Nothing to hold on to yet
+        elif pose != self.stable:
+            if self.strategy == "hysteresis":
+                switch = self.streak >= self.confirm_frames
+            elif self.strategy == "majority":
+                switch = self.counts[pose] * 2 > self.window
+            else:
+                switch = self.counts[pose] == self.window
+            if switch:
+                self.stable = pose
+        return self.stable
+
+
+class KeypointFilter:
+    """One-Euro filter on the face and wrist keypoints before zone classification"""
+
+    def __init__(self, min_cutoff=1.0, beta=0.01):
+        self.filter = OneEuroFilter(min_cutoff, beta)
+
+    def reset(self):
+        self.filter.reset()
+
+    def __call__(self, keypoints, timestamp=None, reliable=None):
+        """Filtered copy of keypoints; points not marked reliable keep their last filtered position"""
+        filtered = np.array(keypoints, dtype=np.float32)
+        points = filtered[CLASSIFIED_KEYPOINTS]
+        if reliable is not None and self.filter.value is not None:
+            unreliable = ~np.asarray(reliable)[CLASSIFIED_KEYPOINTS]
+            points[unreliable] = self.filter.value[unreliable]
+        filtered[CLASSIFIED_KEYPOINTS] = self.filter(points, timestamp)
+        return filtered
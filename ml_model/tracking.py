@@ -0,0 +1,100 @@
+import numpy as np
+
+
+def box_iou(box, boxes):
+    """IoU between one xyxy box and an (n, 4) array of xyxy boxes"""
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return intersection / np.maximum(area + areas - intersection, 1e-6)
+
+
+class PlayerTracker:
+    """
+    Locks onto the calibrated player and keeps following them across frames.
+
+    The lock goes to the largest person standing in the middle zone (where
+    CalibrationDialog asks the player to stand). After that, each frame is
+    associated with one vectorized IoU test of the locked box against the
+    detected boxes, falling back to the nearest box centre for fast
+    movement, so tracking costs next to nothing. Spectators and the
+    opponent are never classified: only the locked player's index is
+    returned.
+    """
+
+    def __init__(self, min_iou=0.3, max_center_shift=0.5, max_misses=15):
+        self.min_iou = min_iou
+        self.max_center_shift = max_center_shift  # Fraction of the locked box width
+        self.max_misses = max_misses  # Frames without a match before the lock is released
+
+        self.next_id = 1
+        self.reset()
+
+    def reset(self):
+        """Drop the current lock; the next select() re-locks onto the calibrated player"""
+        self.track_id = None
+        self.box = None
+        self.misses = 0
+
+    @property
+    def locked(self):
+        return self.track_id is not None
+
+    def lock(self, boxes, center_range):
+        """Lock onto the largest person whose box centre is inside center_range"""
+        centers = (boxes[:, 0] + boxes[:, 2]) / 2
+        in_center = (centers >= center_range[0]) & (centers <= center_range[1])
+        if not in_center.any():
+            return None
+
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        index = int(np.argmax(np.where(in_center, areas, -1)))
+        self.track_id = self.next_id
+        self.next_id += 1
+        self.box = boxes[index].copy()
+        self.misses = 0
+        return index
+
+    def associate(self, boxes):
+        """Index of the box that continues the locked track, or None"""
+        ious = box_iou(self.box, boxes)
+        index = int(np.argmax(ious))
+        if ious[index] >= self.min_iou:
+            return index
+
+        # Fast movement: accept the nearest centre if it moved less than a fraction of the box
+        locked_center = (self.box[:2] + self.box[2:]) / 2
+        centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+        distances = np.linalg.norm(centers - locked_center, axis=1)
+        index = int(np.argmin(distances))
+        if distances[index] <= self.max_center_shift * (self.box[2] - self.box[0]):
+            return index
+        return None
+
+    def select(self, boxes, center_range):
+        """
+        Return the index of the locked player among this frame's boxes, or
+        None if the player is not visible (never another person).
+        """
+        if len(boxes) == 0:
+            index = None
+        elif not self.locked:
+            return self.lock(boxes, center_range)
+        else:
+            index = self.associate(boxes)
+
+        if index is None:
+            self.misses += 1
+            if self.locked and self.misses > self.max_misses:
+                print(f"Lost player {self.track_id}, waiting to re-lock")
+                self.reset()
+            return None
+
+        self.box = boxes[index].copy()
+        self.misses = 0
+        return index
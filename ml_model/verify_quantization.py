@@ -0,0 +1,111 @@
+import argparse
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+sys.path.append("../")
+from ml_model import config
+from ml_model.backends import BACKENDS, create_backend
+from ml_model.benchmark import load_frames
+from ml_model.lean_inference import LeanPosePredictor
+from ml_model.yolo_fightingpose_detection import ZonePoseDetector
+
+
+def first_person_pose(detector, detections):
+    """Raw (unsmoothed) pose of the first detected person, None if nobody was found"""
+    if len(detections.keypoints) == 0:
+        return None, None
+    keypoints = detections.keypoints[0]
+    return detector.classify_pose(keypoints), keypoints
+
+
+def compare(detector, reference, quantized, frames):
+    """Run both predictors over the frames and tally where classify_pose disagrees"""
+    report = {
+        "frames": len(frames),
+        "compared": 0,
+        "disagreements": Counter(),
+        "detection_mismatches": 0,
+        "keypoint_error": [],
+        "reference_ms": 0.0,
+        "quantized_ms": 0.0,
+    }
+
+    detector.setup_zones(frames[0].shape[1])
+    for frame in frames:
+        started = time.perf_counter()
+        reference_detections = reference(frame)
+        report["reference_ms"] += 1000.0 * (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        quantized_detections = quantized(frame)
+        report["quantized_ms"] += 1000.0 * (time.perf_counter() - started)
+
+        reference_pose, reference_keypoints = first_person_pose(detector, reference_detections)
+        quantized_pose, quantized_keypoints = first_person_pose(detector, quantized_detections)
+
+        if (reference_pose is None) != (quantized_pose is None):
+            report["detection_mismatches"] += 1
+            continue
+        if reference_pose is None:
+            continue
+
+        report["compared"] += 1
+        report["keypoint_error"].append(np.abs(reference_keypoints - quantized_keypoints).mean())
+        if reference_pose != quantized_pose:
+            report["disagreements"][(reference_pose, quantized_pose)] += 1
+
+    return report
+
+
+def print_report(report, reference_name, quantized_name):
+    compared = report["compared"]
+    disagreements = sum(report["disagreements"].values())
+    rate = disagreements / compared if compared else 0.0
+    frames = report["frames"]
+
+    print(f"Frames: {frames}, with a person in both: {compared}, "
+          f"person found by only one model: {report['detection_mismatches']}")
+    print(f"classify_pose disagreements: {disagreements} ({100.0 * rate:.2f}%)")
+    for (reference_pose, quantized_pose), count in report["disagreements"].most_common():
+        print(f"  {reference_pose.value:>12} -> {quantized_pose.value:<12} {count}")
+    if report["keypoint_error"]:
+        print(f"Mean keypoint difference: {np.mean(report['keypoint_error']):.2f} px")
+    print(f"{reference_name}: {report['reference_ms'] / frames:.1f} ms/frame, "
+          f"{quantized_name}: {report['quantized_ms'] / frames:.1f} ms/frame")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that a quantized model classifies the same poses as the float model")
+    parser.add_argument("source", help="Recorded clip or image directory")
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--reference", default="onnx", choices=list(BACKENDS))
+    parser.add_argument("--quantized", default="onnx-int8", choices=list(BACKENDS))
+    parser.add_argument("--max-disagreement", type=float, default=0.01,
+                        help="Largest acceptable fraction of frames with a different pose")
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.frames)
+    if not frames:
+        print("Error: Could not read any frames.")
+        sys.exit(1)
+
+    detector = ZonePoseDetector(mode="lean", backend=args.reference)
+    quantized = LeanPosePredictor(create_backend(args.quantized, config.MODEL_PATH, imgsz=config.IMGSZ),
+                                  imgsz=config.IMGSZ)
+
+    report = compare(detector, detector.predictor, quantized, frames)
+    rate = print_report(report, args.reference, args.quantized)
+
+    if rate > args.max_disagreement or report["detection_mismatches"] > args.max_disagreement * len(frames):
+        print("FAIL: the quantized model changes pose classification.")
+        sys.exit(1)
+    print("OK: pose classification is effectively unchanged.")
+
+
+if __name__ == "__main__":
+    main()
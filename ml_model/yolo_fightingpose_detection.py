@@ -1,26 +1,98 @@
-from ultralytics import YOLO
 import cv2
-import torch
-from enum import Enum
 import numpy as np
 import sys
+import time
 from typing import Optional
 sys.path.append("../")
+from ml_model import config
+from ml_model.backends import BACKENDS, create_backend
+from ml_model.classification import FightingPose, classify_keypoints, pose_from_code
+from ml_model.gating import InferenceGate
+from ml_model.keyframes import KeyframeScheduler
+from ml_model.lean_inference import LeanPosePredictor, PoseDetections, draw_keypoints
+from ml_model.onset import OnsetPredictor
+from ml_model.smoothing import KeypointFilter, PoseSmoother
+from ml_model.recording import KeypointRecorder
+from ml_model.roi import ResolutionGovernor, RoiCropper, offset_detections
+from ml_model.tracking import PlayerTracker
 
-class FightingPose(Enum):
-    GUARD = "guard"
-    WEAVE_RIGHT = "weave_right"
-    WEAVE_LEFT = "weave_left"
-    PUNCH_RIGHT = "punch_right"
-    PUNCH_LEFT = "punch_left"
+def detections_from_result(result):
+    """Convert an Ultralytics pose Results object to PoseDetections"""
+    keypoints = result.keypoints
+    return PoseDetections(
+        result.boxes.xyxy.cpu().numpy(),
+        result.boxes.conf.cpu().numpy(),
+        keypoints.xy.cpu().numpy(),
+        keypoints.conf.cpu().numpy() if keypoints.conf is not None
+        else np.ones(keypoints.shape[:2], dtype=np.float32),
+    )
 
 class ZonePoseDetector:
-    def __init__(self):
-        # Load the YOLOv11 model
-        self.model = YOLO("../model_assets/yolo11n-pose.pt")
-        # Set device to MPS for Apple Silicon; fallback to CPU if unavailable
-        self.device = 'mps' if torch.backends.mps.is_available() else 'cpu'
-        self.model.to(self.device)
+    MODES = ("standard", "lean")
+
+    def __init__(self, mode=config.DETECTOR_MODE, backend=config.INFERENCE_BACKEND,
+                 tracking=config.TRACKING, load_model=True, roi=config.ROI_INFERENCE,
+                 frame_budget_ms=config.FRAME_BUDGET_MS, keyframes=config.KEYFRAME_METHOD,
+                 gating=config.INFERENCE_GATING, smoothing=config.SMOOTHING,
+                 keypoint_filter=config.KEYPOINT_FILTER, predictive=config.PREDICTIVE_ONSET,
+                 min_keypoint_confidence=config.KEYPOINT_MIN_CONFIDENCE, record=config.RECORD_PATH,
+                 threads=config.INFERENCE_THREADS):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown detector mode: {mode}")
+        self.mode = mode
+        self.backend_name = backend
+
+        # Without a model the detector only classifies keypoints it is given
+        # (and torch and Ultralytics are never imported)
+        self.device = 'cpu'
+        self.model = None
+        self.predictor = None
+        self.threads = threads
+        if load_model:
+            self.load_model(backend)
+
+        # Only draw the overlay when someone is going to look at it
+        self.render = True
+
+        # Follow the calibrated player instead of whoever is detected first
+        self.tracker = PlayerTracker() if tracking else None
+
+        # Lean mode can crop to the player and adapt its input size at runtime
+        self.roi = None
+        self.governor = None
+        self.keyframes = None
+        if self.predictor is not None:
+            if roi:
+                self.roi = RoiCropper()
+                self.predictor.letterbox.scaleup = False
+            if frame_budget_ms and not self.backend.fixed_shape:
+                self.governor = ResolutionGovernor(frame_budget_ms)
+                self.predictor.set_imgsz(self.governor.imgsz)
+            elif frame_budget_ms:
+                print(f"The {backend} backend has a fixed input size; ignoring the frame budget")
+            if keyframes:
+                self.keyframes = KeyframeScheduler(keyframes, config.KEYFRAME_BUDGET_MS,
+                                                   config.KEYFRAME_MAX_INTERVAL)
+
+        # (keypoints, confidences) of the player in the last processed frame
+        self.player = None
+        # Time of the frame being processed, for the keypoint filter and onset predictor
+        self.frame_time = None
+
+        # Skip inference on static scenes and probe slowly while nobody is there
+        self.gate = None
+        if gating and load_model:
+            self.gate = InferenceGate(idle_after=config.IDLE_AFTER,
+                                      idle_probe_interval=config.IDLE_PROBE_INTERVAL)
+        self.last_pose = None
+
+        # Keep every frame's detections for offline replay
+        self.recorder = KeypointRecorder(record) if record and load_model else None
+
+        # Per-frame cost of process_frame (wall clock and process CPU time)
+        self.frame_count = 0
+        self.total_frame_time = 0.0
+        self.total_cpu_time = 0.0
         
         # Initialize zone boundaries (will be set when first frame is processed)
         self.left_boundary = None
@@ -30,17 +102,71 @@ class ZonePoseDetector:
         self.buffer_percentage = 0.0
         
         # Add pose smoothing
-        self.pose_history = []
-        self.history_length = 3  # Number of frames to consider for smoothing
+        self.smoother = PoseSmoother(smoothing)
+        self.keypoint_filter = KeypointFilter() if keypoint_filter else None
+
+        # Hold the pose when the keypoints it depends on are not reliable
+        self.min_keypoint_confidence = min_keypoint_confidence
+        self.held_frames = 0
+        self.suppressed_commands = 0  # Pose changes unreliable keypoints would have caused
+        self.suppressed_pose = None  # Pose the current run of held frames would have switched to
+
+        # Classify where the wrists and face are heading, not just where they are
+        self.onset = None
+        if predictive:
+            self.onset = OnsetPredictor(lead_time=config.ONSET_LEAD_MS / 1000.0,
+                                        threshold=config.ONSET_THRESHOLD)
 
-    def setup_zones(self, frame_width):
+        # Run the first, slowest inferences now rather than on the first real frame
+        if load_model:
+            self.warmup()
+
+    def load_model(self, backend):
+        """Load the pose model for the configured mode on the given inference backend"""
+        # Imported here so keypoint-only detectors and the UI start without them
+        import torch
+        from ultralytics import YOLO
+
+        # Set device to MPS for Apple Silicon; fallback to CPU if unavailable
+        self.device = 'mps' if torch.backends.mps.is_available() else 'cpu'
+        if self.threads:
+            torch.set_num_threads(self.threads)  # Also covers the Ultralytics predictor
+
+        if self.mode == "lean":
+            # Lean mode calls the backend directly with reusable buffers
+            self.backend = create_backend(backend, config.MODEL_PATH, self.device, config.IMGSZ,
+                                          threads=self.threads)
+            self.predictor = LeanPosePredictor(self.backend, imgsz=config.IMGSZ)
+        elif backend == "torch":
+            # Load the YOLOv11 model
+            self.model = YOLO(config.MODEL_PATH)
+            self.model.to(self.device)
+        elif backend in BACKENDS:
+            # Let Ultralytics run the exported graph
+            self.device = 'cpu'
+            path = BACKENDS[backend].model_path(config.MODEL_PATH, config.IMGSZ)
+            self.model = YOLO(str(path.parent if backend == "openvino" else path), task="pose")
+        else:
+            raise ValueError(f"Unknown inference backend: {backend}")
+
+    def warmup(self, frame_shape=(480, 640, 3), runs=config.WARMUP_RUNS):
+        """Run dummy inferences so allocations and graph optimizations happen up front"""
+        dummy = np.zeros(frame_shape, dtype=np.uint8)
+        for _ in range(runs):
+            if self.predictor is not None:
+                self.predictor(dummy)
+            else:
+                self.model(dummy, device=self.device, verbose=False)
+
+    def setup_zones(self, frame_width, x_start=0):
         """Setup the zone boundaries based on frame width with wider middle zone"""
         # Make middle zone 40% of frame width, leaving 30% for side zones
         middle_zone_width = int(frame_width * 0.4)
         side_zone_width = (frame_width - middle_zone_width) // 2
         
-        self.left_boundary = side_zone_width
-        self.right_boundary = frame_width - side_zone_width
+        # x_start offsets the zones when the player only owns part of the frame
+        self.left_boundary = x_start + side_zone_width
+        self.right_boundary = x_start + frame_width - side_zone_width
         
         # Calculate buffer zones
         self.buffer = int(frame_width * self.buffer_percentage)
@@ -86,86 +212,269 @@ class ZonePoseDetector:
         return face_x
 
     def smooth_pose(self, new_pose):
-        """Apply temporal smoothing to pose detection"""
-        self.pose_history.append(new_pose)
-        if len(self.pose_history) > self.history_length:
-            self.pose_history.pop(0)
-        
-        # Only change pose if we have consistent readings
-        if len(set(self.pose_history)) == 1:
-            return new_pose
-        return self.pose_history[0]  # Return the oldest pose if inconsistent
+        """Apply temporal smoothing to pose detection (None holds the current pose)"""
+        if new_pose is None:
+            return self.smoother.stable
+        return self.smoother.update(new_pose)
 
-    def classify_pose(self, keypoints) -> Optional[FightingPose]:
-        """Classify the fighting pose based on face and hand positions"""
+    def filter_keypoints(self, keypoints, reliable=None):
+        """Smooth the classified keypoints over time (unchanged if the filter is off)"""
+        if self.keypoint_filter is None:
+            return keypoints
+        return self.keypoint_filter(keypoints, self.frame_time, reliable)
+
+    def classify_pose(self, keypoints, confidences=None) -> Optional[FightingPose]:
+        """
+        Classify the fighting pose based on face and hand positions.
+
+        With confidences, keypoints below min_keypoint_confidence are ignored
+        and None is returned when the pose can't be decided from the rest.
+        """
         if keypoints is None or len(keypoints) == 0:
             return None
-            
-        # Get average face position
-        face_x = self.get_face_position(keypoints)
-        
-        # Get hand positions
-        left_wrist = keypoints[9]
-        right_wrist = keypoints[10]
-        
-        # Get zones for face and hands
-        face_zone = self.get_zone(face_x)
-        left_hand_zone = self.get_zone(left_wrist[0])
-        right_hand_zone = self.get_zone(right_wrist[0])
-        
-        # Check for punches first (they take precedence over weaves)
-        # Then check for weaves
-        if face_zone == "left":
-            return FightingPose.WEAVE_LEFT
-        elif face_zone == "right":
-            return FightingPose.WEAVE_RIGHT
-        
-        if left_hand_zone == "right":
-            return FightingPose.PUNCH_RIGHT
-        elif right_hand_zone == "left":
-            return FightingPose.PUNCH_LEFT
-        # elif left_hand_zone == "right" and right_hand_zone == "right":
-        #     return FightingPose.WEAVE_RIGHT
-        # elif left_hand_zone == "left" and right_hand_zone == "left":
-        #     return FightingPose.WEAVE_LEFT
-        
-        
-        # Default to guard if in center or buffer zones
-        return FightingPose.GUARD
+        return pose_from_code(self.classify_poses(keypoints, confidences))
+
+    def classify_poses(self, keypoints, confidences=None):
+        """Pose codes for a (..., 17, 2) keypoint array in this detector's zones (see classification.py)"""
+        return classify_keypoints(keypoints, self.left_boundary, self.right_boundary, self.buffer,
+                                  confidences, self.min_keypoint_confidence)
+
+    def classify_player(self, keypoints, confidences=None):
+        """Filter the player's keypoints and classify them, ahead of time when a move is underway"""
+        reliable = None
+        if confidences is not None:
+            reliable = np.asarray(confidences) >= self.min_keypoint_confidence
+        raw_keypoints = keypoints
+        keypoints = self.filter_keypoints(keypoints, reliable)
+        pose = self.classify_pose(keypoints, confidences)
+
+        if pose is None:
+            # Hold the current pose; count each change the unfiltered keypoints would have made
+            self.held_frames += 1
+            raw_pose = self.classify_pose(raw_keypoints)
+            if raw_pose is not None:
+                if raw_pose not in (self.smoother.stable, self.suppressed_pose):
+                    self.suppressed_commands += 1
+                self.suppressed_pose = raw_pose
+            return None
+        self.suppressed_pose = None
+
+        if self.onset is not None and pose == FightingPose.GUARD:
+            predicted, confidence = self.onset.update(keypoints, self.frame_time)
+            if confidence >= self.onset.threshold:
+                predicted_pose = self.classify_pose(predicted, confidences)
+                if predicted_pose not in (FightingPose.GUARD, None):
+                    self.onset.predicted_count += 1
+                    return predicted_pose
+        elif self.onset is not None:
+            self.onset.update(keypoints, self.frame_time)
+        return pose
+
+    def lose_player(self):
+        """Drop keypoint history once the player is gone, so it is not blended with the next one"""
+        self.suppressed_pose = None
+        if self.keypoint_filter:
+            self.keypoint_filter.reset()
+        if self.onset:
+            self.onset.reset()
+
+    def detect(self, frame):
+        """Run the model and return every detected person as PoseDetections"""
+        if self.predictor is not None:
+            return self.predictor(frame)
+
+        return detections_from_result(self.model(frame, device=self.device, verbose=False)[0])
 
-    def process_frame(self, frame):
-        """Process a single frame and return the detected pose"""
+    def detect_batch(self, frames):
+        """Run the model once over several frames and return PoseDetections for each"""
+        if self.predictor is not None:
+            return self.predictor.predict_batch(frames)
+        results = self.model(list(frames), device=self.device, verbose=False)
+        return [detections_from_result(result) for result in results]
+
+    def select_player(self, boxes):
+        """Index of the person to classify among the detected boxes, or None"""
+        if self.tracker is None:
+            return 0 if len(boxes) > 0 else None  # First (highest scoring) person
+        return self.tracker.select(boxes, (self.left_boundary, self.right_boundary))
+
+    def process_frame(self, frame, timestamp=None):
+        """Process a single frame (captured at timestamp, if known) and return the detected pose"""
         # Setup zones if not already done
         if self.left_boundary is None:
             self.setup_zones(frame.shape[1])
-        
+
+        started, cpu_started = time.perf_counter(), time.process_time()
+        self.frame_time = started if timestamp is None else timestamp
+        if self.gate and not self.gate.should_infer(frame):
+            result = self.reuse_last_pose(frame)
+        else:
+            if self.mode == "lean":
+                result = self.process_frame_lean(frame, timestamp)
+            else:
+                result = self.process_frame_standard(frame)
+            if self.gate:
+                self.gate.record(result[1] is not None)
+        self.last_pose = result[1]
+
+        self.frame_count += 1
+        self.total_frame_time += time.perf_counter() - started
+        self.total_cpu_time += time.process_time() - cpu_started
+        return result
+
+    def reuse_last_pose(self, frame):
+        """Return the last pose for a frame the inference gate skipped"""
+        if self.render:
+            self.draw_zones(frame)
+            if self.mode == "lean" and self.player is not None:
+                draw_keypoints(frame, self.player[0][None], self.player[1][None])
+            if self.last_pose:
+                cv2.putText(frame, f"Pose: {self.last_pose.value}", (10, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+        return frame, self.last_pose
+
+    def process_frame_standard(self, frame):
+        """Run the full Ultralytics predictor; only the tracked player is drawn"""
         # Draw zones on frame
-        self.draw_zones(frame)
+        if self.render:
+            self.draw_zones(frame)
         
         # Run YOLOv11 inference
         results = self.model(frame, device=self.device)
         
-        # Get keypoints from the first detected person
-        if len(results) > 0 and len(results[0].keypoints) > 0:
-            keypoints = results[0].keypoints[0].xy.cpu().numpy()[0]
+        if self.recorder:
+            self.recorder.record(frame.shape, self.frame_time, detections_from_result(results[0]))
+
+        # Get keypoints from the tracked player, or the first detected person
+        boxes = results[0].boxes
+        index = self.select_player(boxes.xyxy.cpu().numpy() if self.tracker else boxes)
+
+        if index is not None:
+            keypoints = results[0].keypoints[index]
+            confidences = keypoints.conf.cpu().numpy()[0] if keypoints.conf is not None else None
+            self.player = (keypoints.xy.cpu().numpy()[0],
+                           confidences if confidences is not None else np.ones(len(keypoints.xy[0]), np.float32))
             
             # Classify and smooth pose
-            raw_pose = self.classify_pose(keypoints)
+            raw_pose = self.classify_player(self.player[0], confidences)
             smoothed_pose = self.smooth_pose(raw_pose)
             
-            # Visualize results
-            annotated_frame = results[0].plot()
-            self.draw_zones(annotated_frame)
+            if not self.render:
+                return frame, smoothed_pose
+
+            # Visualize the tracked player only (zones are already drawn), in place like the lean path
+            draw_keypoints(frame, self.player[0][None], self.player[1][None])
             
             # Add pose classification text
             if smoothed_pose:
-                cv2.putText(annotated_frame, f"Pose: {smoothed_pose.value}", (10, 30),
+                cv2.putText(frame, f"Pose: {smoothed_pose.value}", (10, 30),
                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
                 
-            return annotated_frame, smoothed_pose
+            return frame, smoothed_pose
             
+        self.player = None
+        self.lose_player()
         return frame, None
 
+    def process_frame_lean(self, frame, timestamp=None):
+        """Run the lean predictor; the overlay is drawn in place only when rendering"""
+        if self.keyframes is None:
+            return self.process_detections(frame, self.detect_player_region(frame), timestamp)
+
+        # Between keyframes the player's keypoints are estimated instead of inferred
+        estimate = self.keyframes.estimate(frame)
+        if estimate is not None:
+            if self.left_boundary is None:
+                self.setup_zones(frame.shape[1])
+            return self.process_player(frame, estimate)
+
+        started = time.perf_counter()
+        result = self.process_detections(frame, self.detect_player_region(frame), timestamp)
+        self.keyframes.keyframe(self.player, 1000.0 * (time.perf_counter() - started))
+        return result
+
+    def detect_player_region(self, frame):
+        """Run the lean predictor on the player's region (or the full frame) at the governed size"""
+        started = time.perf_counter()
+        region = self.roi.region(frame.shape) if self.roi else None
+        if region is None:
+            detections = self.predictor(frame)
+        else:
+            x0, y0, x1, y1 = region
+            detections = offset_detections(self.predictor(frame[y0:y1, x0:x1]), x0, y0)
+
+        if self.governor:
+            imgsz = self.governor.record(1000.0 * (time.perf_counter() - started))
+            self.predictor.set_imgsz(imgsz)
+        return detections
+
+    def process_detections(self, frame, detections, timestamp=None):
+        """Classify the player among already computed detections and draw the overlay"""
+        if self.left_boundary is None:
+            self.setup_zones(frame.shape[1])
+        # Replayed frames carry their recorded time
+        self.frame_time = time.perf_counter() if timestamp is None else timestamp
+        if self.recorder:
+            self.recorder.record(frame.shape, self.frame_time, detections)
+
+        index = self.select_player(detections.boxes)
+        if self.roi:
+            if index is None:
+                self.roi.miss()
+            else:
+                self.roi.update(detections.keypoints[index], detections.confidences[index])
+
+        player = None
+        if index is not None:
+            player = (detections.keypoints[index], detections.confidences[index])
+        result = self.process_player(frame, player)
+
+        if self.render and self.tracker and self.tracker.locked and index is not None:
+            x1, y1 = detections.boxes[index][:2].astype(int)
+            cv2.putText(frame, f"Player {self.tracker.track_id}", (int(x1), int(y1) - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 128, 0), 2)
+        return result
+
+    def process_player(self, frame, player):
+        """Classify and smooth the player's (keypoints, confidences), or None if absent, and draw the overlay"""
+        self.player = player
+        smoothed_pose = None
+        if player is not None:
+            # Classify and smooth pose of the player only
+            raw_pose = self.classify_player(*player)
+            smoothed_pose = self.smooth_pose(raw_pose)
+        else:
+            self.lose_player()
+
+        if self.render:
+            self.draw_zones(frame)
+            if player is not None:
+                draw_keypoints(frame, player[0][None], player[1][None])
+            if smoothed_pose:
+                cv2.putText(frame, f"Pose: {smoothed_pose.value}", (10, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+
+        return frame, smoothed_pose
+
+    def close(self):
+        """Flush and close the keypoint recording, if any"""
+        if self.recorder:
+            self.recorder.close()
+
+    def timing_stats(self):
+        """Average wall clock and CPU milliseconds spent per processed frame, plus work saved"""
+        frames = self.frame_count
+        return {
+            "frames": frames,
+            "avg_ms": 1000.0 * self.total_frame_time / frames if frames else 0.0,
+            "avg_cpu_ms": 1000.0 * self.total_cpu_time / frames if frames else 0.0,
+            "estimated_frames": self.keyframes.estimated_count if self.keyframes else 0,
+            "skipped_inferences": self.gate.skipped if self.gate else 0,
+            "predicted_poses": self.onset.predicted_count if self.onset else 0,
+            "held_frames": self.held_frames,
+            "suppressed_commands": self.suppressed_commands,
+        }
+
 def main():
     detector = ZonePoseDetector()
     cap = cv2.VideoCapture(0)